@@ -20,8 +20,8 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 # target_metadata = None
 
-from app.user.models import User
-from app.post.models import Post
+from app.domain.user.models import User
+from app.domain.post.models import Post
 
 
 from app.core.database import Base
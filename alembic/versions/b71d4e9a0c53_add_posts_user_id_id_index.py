@@ -0,0 +1,41 @@
+"""add posts (user_id, id desc) index
+
+Revision ID: b71d4e9a0c53
+Revises: 3f9a6c1e2b47
+Create Date: 2026-10-18 11:03:47.905318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71d4e9a0c53'
+down_revision: Union[str, Sequence[str], None] = '3f9a6c1e2b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 54ee9ef9fe53 created the foreign key as posts.owner_id, the model has always used
+    # posts.user_id. Rename it on databases that still have the old name.
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns('posts')}
+    if 'owner_id' in columns and 'user_id' not in columns:
+        op.alter_column('posts', 'owner_id', new_column_name='user_id')
+
+    # Per-user feed: WHERE user_id = :id AND id < :cursor ORDER BY id DESC LIMIT n
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_user_id_id', 'posts', ['user_id', sa.text('id DESC')],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_user_id_id', table_name='posts', postgresql_concurrently=True)
+    # the owner_id → user_id rename is kept: the application code needs user_id
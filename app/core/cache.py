@@ -0,0 +1,446 @@
+## Response cache (Redis)
+# Read-through cache for GET endpoints, built on RedisClient.
+#
+# @cached("user:{id}", ttl=60, model=schema.getUser)
+#   - key is a template filled with the endpoint's arguments
+#   - the endpoint result is serialized with `model` (ORM → JSON bytes, one pydantic-core pass)
+#     before it's stored, and a hit sends those bytes as the response body: nothing is
+#     parsed, validated or encoded again (see app/core/serialization.py)
+#   - without `model` the value must be JSON-able and goes through the route's response_model
+#
+# Stampede protection:
+#   - single-flight: on a miss only ONE caller refills the key. Inside a worker, concurrent
+#     requests share one asyncio future; across workers, a short Redis lock (SET NX PX) decides
+#     who loads, the others poll the key for a moment instead of all hitting Postgres.
+#   - stale-while-revalidate: entries are kept `stale_ttl` seconds past their freshness.
+#     A stale hit is answered with the stale value right away, and a background task (one
+#     per key per worker, and only where it wins the Redis lock) reloads the entry. No
+#     request waits for the refresh. The refresh gets its own AsyncSession: the request's
+#     one is closed by FastAPI once the response is sent.
+#
+# If Redis is down the loader is simply called (cache is an optimisation, never a dependency),
+# and Redis is skipped for a few seconds so requests don't pay a connect timeout each time.
+#
+# Two tiers:
+#   1. LocalCache  → bounded LRU+TTL dict inside this worker process (no network at all)
+#   2. Redis       → shared by all workers
+# `local_ttl` (seconds, short) turns tier 1 on for an endpoint. Writes call invalidate(), which
+# deletes the Redis keys and publishes the keys on a Redis channel; every worker runs
+# listen_for_invalidations() (started in the app lifespan) and evicts them from its LocalCache.
+#
+# Families of keys (every page of a list) are versioned instead of deleted one by one:
+#   @cached("users:v{version}:page={page}", version="users")
+# puts the current value of the "users" counter in the key, and bump_version("users") (one
+# INCR + publish) makes every cached page unreachable at once; the old entries just expire.
+# No SCAN over the keyspace on the write path. Workers keep the counter for `version_ttl`
+# seconds, so a lost pub/sub message delays a bump by that much at most.
+
+import asyncio
+import contextvars
+import functools
+import json
+import time
+import uuid
+from collections import OrderedDict
+
+import orjson
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.redis import RedisClient, get_redis_client
+from app.core.serialization import JSONBytesResponse, dump_json
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+_MISSING = object()
+
+# Compare-and-delete: only release the lock if we still own it
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+# In-process LRU + TTL cache (one per worker). Only used from the event loop thread.
+class LocalCache:
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default=None):
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        prefix: str = "cache:",
+        lock_timeout: float = 5.0,
+        poll_interval: float = 0.05,
+        retry_after: float = 5.0,
+        local_maxsize: int = 1024,
+        version_ttl: float = 5.0,
+    ):
+        self.redis_client = redis_client
+        self.local = LocalCache(local_maxsize)
+        self.versions = LocalCache(256)   # version name → counter value (own LRU: few, hot entries)
+        self.version_ttl = version_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.retry_after = retry_after
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}   # key → stale-while-revalidate task
+        self._down_until = 0.0
+
+    # --- Redis helpers (never raise: a Redis problem means "no cache") ---
+
+    async def _redis(self):
+        if not settings.CACHE_ENABLED or time.monotonic() < self._down_until:
+            return None
+        return await self.redis_client.get_client()
+
+    def _mark_down(self, exc: Exception):
+        self.errors += 1
+        # We may miss invalidation messages while Redis is unreachable
+        self.local.clear()
+        self.versions.clear()
+        logger.warning("Response cache disabled for %ss: %s", self.retry_after, exc)
+        self._down_until = time.monotonic() + self.retry_after
+
+    # Stored formats:
+    #   bytes values (serialized responses) → "<fresh_until>\n<bytes>": no JSON parsing on a hit
+    #   anything else                       → JSON {"v": value, "fresh_until": ...}
+    async def _read(self, key: str):
+        try:
+            client = await self._redis()
+            if client is None:
+                return None
+            raw = await client.get(self.prefix + key)
+        except (RedisError, OSError) as exc:
+            self._mark_down(exc)
+            return None
+        if not raw:
+            return None
+        if raw[0] == "{":
+            return orjson.loads(raw)
+        fresh_until, _, body = raw.partition("\n")
+        return {"v": body.encode(), "fresh_until": float(fresh_until)}
+
+    async def _write(self, key: str, value, ttl: int, stale_ttl: int):
+        fresh_until = time.time() + ttl
+        if isinstance(value, bytes):
+            payload = b"%.3f\n" % fresh_until + value
+        else:
+            payload = orjson.dumps({"v": value, "fresh_until": fresh_until}, default=str)
+        try:
+            client = await self._redis()
+            if client is not None:
+                await client.set(self.prefix + key, payload, ex=ttl + stale_ttl)
+        except (RedisError, OSError) as exc:
+            self._mark_down(exc)
+
+    async def _acquire_lock(self, key: str):
+        token = uuid.uuid4().hex
+        try:
+            client = await self._redis()
+            if client is None:
+                return token  # no Redis → nothing to coordinate with
+            ok = await client.set(f"{self.prefix}lock:{key}", token, nx=True, px=int(self.lock_timeout * 1000))
+        except (RedisError, OSError) as exc:
+            self._mark_down(exc)
+            return token
+        return token if ok else None
+
+    async def _release_lock(self, key: str, token: str):
+        try:
+            client = await self._redis()
+            if client is not None:
+                await client.eval(_RELEASE_LOCK, 1, f"{self.prefix}lock:{key}", token)
+        except (RedisError, OSError) as exc:
+            self._mark_down(exc)
+
+    # --- public API ---
+
+    # Drop keys from Redis and, through the pub/sub channel, from the LocalCache of every
+    # worker. (Many keys at once: use a version, see bump_version.)
+    async def invalidate(self, *keys: str):
+        self._apply_invalidation({"keys": list(keys)})
+        try:
+            client = await self._redis()
+            if client is None:
+                return
+            if keys:
+                await client.unlink(*(self.prefix + key for key in keys))
+            await client.publish(INVALIDATION_CHANNEL, json.dumps({"keys": keys}))
+        except (RedisError, OSError) as exc:
+            self._mark_down(exc)
+
+    # Current value of a version counter (0 until the first bump, or without Redis)
+    async def version(self, name: str) -> int:
+        value = self.versions.get(name)
+        if value is not None:
+            return value
+        try:
+            client = await self._redis()
+            value = int(await client.get(f"{self.prefix}version:{name}") or 0) if client is not None else 0
+        except (RedisError, OSError) as exc:
+            self._mark_down(exc)
+            return 0
+        self.versions.set(name, value, self.version_ttl)
+        return value
+
+    # Invalidate every key built with this version: one INCR, and every worker is told the
+    # new value right away (until it expires from their `versions`, they'd use the old one)
+    async def bump_version(self, name: str):
+        self.versions.delete(name)
+        try:
+            client = await self._redis()
+            if client is None:
+                return
+            value = await client.incr(f"{self.prefix}version:{name}")
+            self.versions.set(name, value, self.version_ttl)
+            await client.publish(INVALIDATION_CHANNEL, json.dumps({"versions": {name: value}}))
+        except (RedisError, OSError) as exc:
+            self._mark_down(exc)
+
+    def _apply_invalidation(self, message: dict):
+        self.local.delete(*message.get("keys", ()))
+        for name, value in message.get("versions", {}).items():
+            # never go back: messages from two quick bumps may arrive in any order
+            if value > (self.versions.get(name) or 0):
+                self.versions.set(name, value, self.version_ttl)
+
+    # Long-running task (one per worker): evict LocalCache entries written by other workers.
+    async def listen_for_invalidations(self):
+        while True:
+            try:
+                client = await self.redis_client.get_client()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._apply_invalidation(json.loads(message["data"]))
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError) as exc:
+                self._mark_down(exc)
+                await asyncio.sleep(self.retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "local": self.local.stats(),
+            "redis": {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "refreshing": len(self._refreshing),
+            },
+        }
+
+    # refresh_loader: used by the background refresh of a stale entry (default: loader)
+    async def get_or_set(self, key: str, ttl: int, loader, stale_ttl: int = 0, local_ttl: float = 0, refresh_loader=None):
+        if local_ttl:
+            value = self.local.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+        envelope = await self._read(key)
+        if envelope is not None:
+            remaining = envelope["fresh_until"] - time.time()
+            if remaining > 0:
+                self.hits += 1
+                if local_ttl:
+                    self.local.set(key, envelope["v"], min(local_ttl, remaining))
+                return envelope["v"]
+            # Stale: serve it now, refresh it in the background
+            self.stale_hits += 1
+            self._refresh_in_background(key, ttl, stale_ttl, refresh_loader or loader, local_ttl)
+            return envelope["v"]
+
+        self.misses += 1
+        value = await self._single_flight(key, ttl, stale_ttl, loader)
+
+        if local_ttl and value is not None:
+            self.local.set(key, value, min(local_ttl, ttl))
+        return value
+
+    def _refresh_in_background(self, key: str, ttl: int, stale_ttl: int, loader, local_ttl: float):
+        if key in self._refreshing:
+            return
+        # empty context: the refresh outlives the request, its queries are not the request's
+        task = asyncio.create_task(
+            self._refresh(key, ttl, stale_ttl, loader, local_ttl), context=contextvars.Context()
+        )
+        self._refreshing[key] = task
+        task.add_done_callback(functools.partial(self._refresh_done, key))
+
+    async def _refresh(self, key: str, ttl: int, stale_ttl: int, loader, local_ttl: float):
+        token = await self._acquire_lock(key)
+        if token is None:
+            return  # another worker is refreshing it
+        value = await self._load(key, ttl, stale_ttl, loader, token)
+        if local_ttl and value is not None:
+            self.local.set(key, value, min(local_ttl, ttl))
+
+    def _refresh_done(self, key: str, task: asyncio.Task):
+        self._refreshing.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background refresh of %s failed", key, exc_info=task.exception())
+
+    # Shutdown: stop the background refreshes still running
+    async def aclose(self):
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # One load per key per worker; other coroutines await the same future
+    async def _single_flight(self, key: str, ttl: int, stale_ttl: int, loader):
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                return await loader()  # the loading request was cancelled, don't inherit that
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._fill(key, ttl, stale_ttl, loader)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved, waiters (if any) re-raise it
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    # Miss across workers: lock holder loads, others wait for the value to appear
+    async def _fill(self, key: str, ttl: int, stale_ttl: int, loader):
+        token = await self._acquire_lock(key)
+        if token is None:
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                envelope = await self._read(key)
+                if envelope is not None:
+                    return envelope["v"]
+            # Lock holder is slow or died: load it ourselves
+            token = await self._acquire_lock(key)
+        return await self._load(key, ttl, stale_ttl, loader, token)
+
+    async def _load(self, key: str, ttl: int, stale_ttl: int, loader, token: str | None):
+        try:
+            value = await loader()
+            if value is not None:
+                await self._write(key, value, ttl, stale_ttl)
+            return value
+        finally:
+            if token is not None:
+                await self._release_lock(key, token)
+
+
+response_cache = ResponseCache(get_redis_client(), local_maxsize=settings.CACHE_LOCAL_MAXSIZE)
+
+
+# Decorator for async read endpoints. Put it under @router.get (and @limiter.limit):
+#
+#   @router.get('/{id}', response_model=schema.getUser)
+#   @cached("user:{id}", ttl=60, model=schema.getUser)
+#   async def get_user(id: int, db: AsyncSession = Depends(get_async_db)): ...
+#
+# functools.wraps keeps the original signature, so FastAPI still injects the dependencies.
+# A background refresh (stale_ttl) calls the endpoint with a new AsyncSession in place of
+# the request's one.
+# version="name": the key template gets {version}, the current value of that counter.
+def cached(key: str, ttl: int = 60, stale_ttl: int = 0, local_ttl: float = 0, model=None, version: str | None = None):
+    adapter = TypeAdapter(model) if model is not None else None
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async def load(**call_kwargs):
+                value = await func(*args, **call_kwargs)
+                if adapter is not None and value is not None:
+                    value = dump_json(adapter, value)
+                return value
+
+            async def loader():
+                return await load(**kwargs)
+
+            async def refresh_loader():
+                async with database.AsyncSessionLocal() as db:
+                    return await load(**{
+                        name: db if isinstance(value, AsyncSession) else value for name, value in kwargs.items()
+                    })
+
+            fields = kwargs
+            if version is not None:
+                fields = {**kwargs, "version": await response_cache.version(version)}
+            value = await response_cache.get_or_set(
+                key.format(**fields), ttl, loader, stale_ttl=stale_ttl, local_ttl=local_ttl,
+                refresh_loader=refresh_loader,
+            )
+            # bytes → already serialized with `model`, sent as is
+            return JSONBytesResponse(value) if isinstance(value, bytes) else value
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,184 @@
+## Traffic capture (opt-in: CAPTURE_ENABLED=true)
+# Appends a sample of the real requests to logs/capture.jsonl, one JSON object per line, to
+# replay them later against a staging build:  python -m benchmarks.replay logs/capture.jsonl
+#
+#   {"ts": 1760000000.123, "method": "GET", "path": "/api/v1/user/42/posts",
+#    "route": "/api/v1/user/{id}/posts", "query": {"first": "10", "after": "<str:24>"},
+#    "auth": true, "body_hmac": null, "body_shape": null, "status": 200, "latency_ms": 12.3}
+#
+# Anonymized: no headers (only whether an Authorization header was sent), no cookies, no
+# client address, and no body: an HMAC-SHA256 of it (same payload → same digest) and its JSON
+# "shape" ({"title": "str", "user_id": "int"}) so the replay can send a similar one.
+# Keyed, not a plain SHA-256: login bodies hold email + password, and a plain hash of those
+# can be brute-forced offline from the capture file with an email list and a password
+# dictionary. The key is derived from SECRET_KEY and never written anywhere.
+# Query values that are numbers or booleans are kept (page sizes, ids), other values become
+# "<str:length>".
+#
+# Cost: a request not sampled (CAPTURE_SAMPLE_RATE) costs one random() call. A sampled one is
+# put on a bounded queue; a background thread writes the file (rotated at CAPTURE_MAX_BYTES).
+# Same pipeline as app/core/logging.py: when the writer falls behind, records are dropped and
+# counted (/internal/capture) instead of slowing requests down.
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+from urllib.parse import parse_qsl
+
+from app.core.config import settings
+from app.core.logging import LOG_DIR, DroppingQueueHandler
+
+CAPTURE_FILE = os.path.join(LOG_DIR, "capture.jsonl")
+
+_BOOLEANS = {"true", "false"}
+
+# HMAC key for the request bodies (own key: the JWT signing key itself is never reused)
+_BODY_KEY = hmac.new(settings.SECRET_KEY.encode(), b"traffic-capture:body", hashlib.sha256).digest()
+
+
+def body_digest(body: bytes) -> str:
+    return hmac.new(_BODY_KEY, body, hashlib.sha256).hexdigest()
+
+
+def _query_value(value: str) -> str:
+    if value.lower() in _BOOLEANS or value.lstrip("-").replace(".", "", 1).isdigit():
+        return value
+    if all(part.isdigit() for part in value.split(",")):   # ?ids=1,2,3
+        return value
+    return f"<str:{len(value)}>"
+
+
+# Types only, values dropped. Lists keep their length and the shape of their first item.
+def body_shape(value, depth: int = 0):
+    if isinstance(value, dict):
+        return {key: body_shape(item, depth + 1) for key, item in value.items()} if depth < 5 else "object"
+    if isinstance(value, list):
+        return {"list": len(value), "item": body_shape(value[0], depth + 1) if value else None}
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if value is None:
+        return "null"
+    return "str"
+
+
+class TrafficCapture:
+    def __init__(self, path: str = CAPTURE_FILE):
+        self.path = path
+        self.sampled = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.CAPTURE_QUEUE_SIZE)
+        self.handler = DroppingQueueHandler(self._queue)
+        self._listener: QueueListener | None = None
+        # own logger, not propagated: captured traffic never ends up in debug.log
+        self.logger = logging.getLogger("app.capture")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def start(self):
+        if self._listener is not None:
+            return
+        file_handler = RotatingFileHandler(
+            self.path, maxBytes=settings.CAPTURE_MAX_BYTES, backupCount=settings.CAPTURE_BACKUP_COUNT, encoding="utf-8"
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger.addHandler(self.handler)
+        self._listener = QueueListener(self._queue, file_handler)
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()   # writes what is still queued
+            self.logger.removeHandler(self.handler)
+            self._listener = None
+
+    def write(self, record: dict):
+        self.sampled += 1
+        self.logger.info(json.dumps(record, separators=(",", ":")))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._listener is not None,
+            "sample_rate": settings.CAPTURE_SAMPLE_RATE,
+            "sampled": self.sampled,
+            "written": self.handler.queued,
+            "dropped": self.handler.dropped,
+            "file": self.path,
+        }
+
+
+traffic_capture = TrafficCapture()
+
+
+## ASGI middleware
+class CaptureMiddleware:
+    def __init__(self, app, sample_rate: float | None = None, capture: TrafficCapture = traffic_capture):
+        self.app = app
+        self.sample_rate = sample_rate if sample_rate is not None else settings.CAPTURE_SAMPLE_RATE
+        self.capture = capture
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            return await self.app(scope, receive, send)
+
+        started_at = time.time()
+        start = time.perf_counter()
+        body = bytearray()
+        size = 0
+        truncated = False
+        status = 500
+
+        async def receive_body():
+            nonlocal size, truncated
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if not truncated:
+                    body.extend(chunk)
+                    if len(body) > settings.CAPTURE_MAX_BODY:   # too big to hash / parse: size only
+                        truncated = True
+                        body.clear()
+            return message
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_status)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            route = scope.get("route")
+            headers = dict(scope["headers"])
+            query = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+            shape = None
+            if body and b"json" in headers.get(b"content-type", b""):
+                try:
+                    shape = body_shape(json.loads(body))
+                except ValueError:
+                    shape = None
+            self.capture.write({
+                "ts": round(started_at, 3),
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route.path if route is not None else None,
+                "query": {key: _query_value(value) for key, value in query},
+                "auth": b"authorization" in headers,
+                "content_type": headers.get(b"content-type", b"").decode("latin-1") or None,
+                "body_hmac": body_digest(body) if body else None,
+                "body_bytes": size,
+                "body_shape": shape,
+                "status": status,
+                "latency_ms": round(latency_ms, 3),
+            })
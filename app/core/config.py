@@ -8,13 +8,85 @@ class Settings(BaseSettings):
     DATABASE_HOST: str = "localhost"
     DATABASE_PORT: int = 5432
     DATABASE_NAME: str
+    # Connection pool (per engine, per uvicorn worker)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30       # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800     # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False           # log every SQL statement (debug only)
     APP_PORT: int
+    # Startup warm-up: DB connections opened before the first request (0 = off), and whether
+    # the bcrypt worker processes are started right away (in the background) or on first use
+    WARMUP_DB_CONNECTIONS: int = 2
+    WARMUP_HASH_POOL: bool = True
+    WARMUP_TIMEOUT: float = 2.0     # seconds for the whole warm-up; steps still running are dropped
     
+    # Redis / response cache
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_ENABLED: bool = True
+    CACHE_LOCAL_MAXSIZE: int = 1024     # entries in the per-worker in-process tier
+
+    # Rate limiting: "memory" (per worker) or "redis" (shared, falls back to memory if Redis is down)
+    RATE_LIMIT_STORAGE: str = "memory"
+    RATE_LIMIT_ENABLED: bool = True     # false: limits are not checked (load tests)
+
+    # GraphQL: parsed/validated documents and persisted queries kept per worker, APQ TTL in Redis
+    GRAPHQL_DOCUMENT_CACHE_SIZE: int = 1000
+    GRAPHQL_APQ_TTL: int = 86400
+    # GraphQL query limits (checked before execution)
+    GRAPHQL_MAX_DEPTH: int = 8
+    GRAPHQL_MAX_COST: int = 5000
+    GRAPHQL_DEFAULT_LIST_SIZE: int = 10     # assumed size of list fields without first/limit
+
     # Auth configuration
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    # bcrypt process pool (0 → one worker per CPU core) and how many calls may wait for it
+    HASH_POOL_WORKERS: int = 0
+    HASH_POOL_MAX_QUEUE: int = 64
+    # Bulk imports hash a few passwords per job on at most this many workers at once
+    # (0 → all but one), so logins and sign-ups always find a free worker
+    HASH_POOL_BULK_WORKERS: int = 0
+    HASH_POOL_BULK_BATCH: int = 4
+    # Authenticated principal: cached per (sub, jti) for N seconds, or built from the token claims
+    AUTH_PRINCIPAL_CACHE_TTL: int = 30
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000  # principals kept per worker
+    AUTH_STATELESS: bool = False
+    JWT_CACHE_MAXSIZE: int = 10000      # verified tokens kept per worker
+    # users.level at or above this is an admin (bulk import, exports, /internal)
+    ADMIN_LEVEL: int = 10
+    # Shared token for /internal scrapers (Authorization: Bearer <token>); empty = admins only
+    INTERNAL_TOKEN: str = ""
+
+    # Bulk user import: rows validated / hashed / inserted per round trip
+    BULK_IMPORT_CHUNK_SIZE: int = 1000
+    # Exports: rows fetched per server-side cursor round trip (= rows per streamed chunk)
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Logging (see app/core/logging.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000             # records waiting for the writer thread; more are dropped
+    LOG_SAMPLING: dict[str, float] = {}     # logger name → share of records < WARNING kept, e.g. {"sqlalchemy.engine": 0.01}
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024   # rotate logs/debug.log at this size
+    LOG_BACKUP_COUNT: int = 5
+    LOG_CONSOLE_JSON: bool = False          # console as JSON lines too (containers), else plain text
+
+    # Slow-query detector + per-request query budget (see app/core/query_budget.py)
+    QUERY_BUDGET_ENABLED: bool = False
+    QUERY_BUDGET_MAX_STATEMENTS: int = 20   # statements per request before the top offenders are logged
+    QUERY_BUDGET_MAX_MS: float = 200        # total DB time per request (ms), same
+    SLOW_QUERY_MS: float = 100              # a single statement slower than this is logged
+
+    # Traffic capture for replay (see app/core/capture.py)
+    CAPTURE_ENABLED: bool = False
+    CAPTURE_SAMPLE_RATE: float = 0.01       # share of requests written to logs/capture.jsonl
+    CAPTURE_MAX_BODY: int = 64 * 1024       # larger bodies are not hashed / described, only their size is kept
+    CAPTURE_QUEUE_SIZE: int = 10000
+    CAPTURE_MAX_BYTES: int = 50 * 1024 * 1024
+    CAPTURE_BACKUP_COUNT: int = 5
 
     # Pagination
     DEFAULT_PAGE: int
@@ -0,0 +1,67 @@
+## Bounded process pool for CPU-heavy work (bcrypt, ...)
+# CPU-bound Python code holds the GIL: running it on the request thread (or in the default
+# threadpool) stalls every other request served by the same worker.
+# A process pool runs it on other cores instead, and the event loop just awaits the result.
+#
+# Backpressure: at most max_workers jobs run and max_queue more may wait. Past that the
+# caller gets a 503 right away instead of queueing behind seconds of hashing.
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+
+from app.core.metrics import metrics
+
+
+class BoundedProcessPool:
+    def __init__(self, max_workers: int = 0, max_queue: int = 64):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._executor: ProcessPoolExecutor | None = None
+        self._inflight = 0   # only touched from the event loop thread
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs threads (anyio, DB drivers) can deadlock
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self._inflight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, try again.", headers={"Retry-After": "1"})
+        self._inflight += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._inflight -= 1
+            metrics.observe_pool((time.perf_counter() - start) * 1000)
+
+    # Start every worker process now (spawn + imports take ~100ms+ each) by giving each one
+    # a call of `fn`, e.g. a function from the module the real jobs will use.
+    async def warm_up(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, fn, *args) for _ in range(self.max_workers)))
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "inflight": self._inflight,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,257 @@
+## Strawberry schema extensions
+# Passed to strawberry.Schema(extensions=[...]) as classes: Strawberry creates one instance
+# per request, so shared state (the caches) lives at module level.
+
+import hashlib
+import time
+from inspect import isawaitable
+
+from graphql import (
+    ExecutionResult,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationDefinitionNode,
+    VariableNode,
+    get_named_type,
+    get_nullable_type,
+    is_list_type,
+    parse,
+)
+from redis.exceptions import RedisError
+from strawberry.extensions import SchemaExtension
+
+from app.core.cache import LocalCache
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import metrics
+from app.core.redis import get_redis_client
+
+NO_EXPIRY = float("inf")
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+## Automatic persisted queries (Apollo APQ protocol)
+# Clients send {"extensions": {"persistedQuery": {"version": 1, "sha256Hash": "..."}}}
+# without the query text. Unknown hash → PERSISTED_QUERY_NOT_FOUND, the client retries
+# once with query + hash, we store it, and from then on only the hash goes over the wire.
+# Storage: this worker's memory first, then Redis (shared by all workers).
+_persisted_queries = LocalCache(settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+
+
+async def _load_persisted_query(sha256: str) -> str | None:
+    query = _persisted_queries.get(sha256)
+    if query is None:
+        try:
+            client = await get_redis_client().get_client()
+            query = await client.get(f"apq:{sha256}")
+        except (RedisError, OSError) as exc:
+            logger.warning("APQ lookup skipped, Redis unavailable: %s", exc)
+        if query is not None:
+            _persisted_queries.set(sha256, query, NO_EXPIRY)
+    return query
+
+
+async def _store_persisted_query(sha256: str, query: str):
+    _persisted_queries.set(sha256, query, NO_EXPIRY)
+    try:
+        client = await get_redis_client().get_client()
+        await client.set(f"apq:{sha256}", query, ex=settings.GRAPHQL_APQ_TTL)
+    except (RedisError, OSError) as exc:
+        logger.warning("APQ store skipped, Redis unavailable: %s", exc)
+
+
+class PersistedQueries(SchemaExtension):
+    async def on_operation(self):
+        ctx = self.execution_context
+        persisted = (ctx.operation_extensions or {}).get("persistedQuery")
+        if persisted:
+            if persisted.get("version") != 1:
+                raise GraphQLError(
+                    "Unsupported persisted query version",
+                    extensions={"code": "PERSISTED_QUERY_NOT_SUPPORTED"},
+                )
+            sha256 = persisted.get("sha256Hash")
+            if ctx.query is None:
+                ctx.query = await _load_persisted_query(sha256) if sha256 else None
+                if ctx.query is None:
+                    raise GraphQLError("PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"})
+            elif query_hash(ctx.query) != sha256:
+                raise GraphQLError("provided sha does not match query", extensions={"code": "BAD_REQUEST"})
+            else:
+                await _store_persisted_query(sha256, ctx.query)
+        yield
+
+
+## Parsed + validated document cache
+# Key: sha256 of the query text → (DocumentNode, validation errors).
+# A repeated query skips both graphql-core's parser and the validation visitor.
+_documents = LocalCache(settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+
+
+class DocumentCache(SchemaExtension):
+    def on_parse(self):
+        ctx = self.execution_context
+        key = query_hash(ctx.query)
+        entry = _documents.get(key)
+        if entry is None:
+            entry = {"document": parse(ctx.query, **ctx.parse_options), "errors": None}
+            _documents.set(key, entry, NO_EXPIRY)
+        ctx.graphql_document = entry["document"]
+        yield
+
+    # Only graphql-core's validate() result is stored: it depends on the query text alone.
+    # Checks that depend on the variables (QueryCost) run on every request, in on_execute.
+    def on_validate(self):
+        ctx = self.execution_context
+        entry = _documents.get(query_hash(ctx.query))
+        if entry is not None and entry["errors"] is not None:
+            # already validated: Strawberry skips validation when this is not None
+            ctx.pre_execution_errors = entry["errors"]
+        yield
+        if entry is not None and entry["errors"] is None:
+            entry["errors"] = list(ctx.pre_execution_errors or [])
+
+
+## Query cost analysis + depth limit
+# Every field costs 1; a list field multiplies the cost of everything below it by its size
+# (`first` / `limit` argument, or GRAPHQL_DEFAULT_LIST_SIZE when the client doesn't say).
+# So users(first: 100) { posts { user { posts { id } } } } costs ~100 * 10 * 10 * ... and is
+# rejected before a single resolver runs, instead of starving the DB pool for everyone.
+# The computed cost is returned in the response under extensions.cost.
+# Measured in on_execute (the document is valid by then), on every request: a list size can
+# come from a variable, so the same query text may be cheap in one call and too costly in
+# the next. A rejected query gets its result set here and graphql-core never executes it.
+class QueryCost(SchemaExtension):
+    LIST_SIZE_ARGS = ("first", "limit")
+
+    cost: int | None = None
+    depth: int | None = None
+
+    def on_execute(self):
+        ctx = self.execution_context
+        if ctx.graphql_document is not None:
+            self._measure(ctx)
+            error = None
+            if self.depth > settings.GRAPHQL_MAX_DEPTH:
+                error = GraphQLError(
+                    f"Query depth {self.depth} exceeds the maximum of {settings.GRAPHQL_MAX_DEPTH}.",
+                    extensions={"code": "QUERY_TOO_DEEP"},
+                )
+            elif self.cost > settings.GRAPHQL_MAX_COST:
+                error = GraphQLError(
+                    f"Query cost {self.cost} exceeds the maximum of {settings.GRAPHQL_MAX_COST}.",
+                    extensions={"code": "QUERY_TOO_COMPLEX"},
+                )
+            if error is not None:
+                # Strawberry skips execution when the result is already set
+                ctx.result = ExecutionResult(data=None, errors=[error])
+        yield
+
+    def get_results(self):
+        if self.cost is None:
+            return {}
+        return {"cost": {"requested": self.cost, "depth": self.depth, "maximum": settings.GRAPHQL_MAX_COST}}
+
+    def _measure(self, ctx):
+        schema = ctx.schema._schema
+        fragments = {}
+        operation = None
+        for definition in ctx.graphql_document.definitions:
+            if isinstance(definition, FragmentDefinitionNode):
+                fragments[definition.name.value] = definition
+            elif isinstance(definition, OperationDefinitionNode):
+                if ctx.operation_name is None or (definition.name and definition.name.value == ctx.operation_name):
+                    operation = operation or definition
+        if operation is None:
+            self.cost, self.depth = 0, 0
+            return
+        root = schema.get_root_type(operation.operation)
+        self.cost, self.depth = self._selection_cost(operation.selection_set, root, fragments, ctx.variables or {}, 1)
+
+    def _selection_cost(self, selection_set, parent_type, fragments, variables, depth) -> tuple[int, int]:
+        cost, max_depth = 0, depth - 1
+        for selection in selection_set.selections if selection_set else ():
+            if isinstance(selection, FieldNode):
+                name = selection.name.value
+                if name.startswith("__"):  # introspection / __typename are free
+                    continue
+                field = getattr(parent_type, "fields", {}).get(name)
+                if field is None:  # unknown field: validation will reject it
+                    continue
+                child_cost, child_depth = self._selection_cost(
+                    selection.selection_set, get_named_type(field.type), fragments, variables, depth + 1
+                )
+                multiplier = 1
+                if is_list_type(get_nullable_type(field.type)):
+                    multiplier = self._list_size(selection, variables)
+                cost += multiplier * (1 + child_cost)
+                max_depth = max(max_depth, child_depth if selection.selection_set else depth)
+            else:
+                if isinstance(selection, FragmentSpreadNode):
+                    fragment = fragments.get(selection.name.value)
+                    if fragment is None:
+                        continue
+                    sub_selection, condition = fragment.selection_set, fragment.type_condition
+                elif isinstance(selection, InlineFragmentNode):
+                    sub_selection, condition = selection.selection_set, selection.type_condition
+                else:
+                    continue
+                sub_type = parent_type
+                if condition is not None:
+                    sub_type = self.execution_context.schema._schema.get_type(condition.name.value) or parent_type
+                sub_cost, sub_depth = self._selection_cost(sub_selection, sub_type, fragments, variables, depth)
+                cost += sub_cost
+                max_depth = max(max_depth, sub_depth)
+        return cost, max_depth
+
+    def _list_size(self, field_node, variables) -> int:
+        for argument in field_node.arguments or ():
+            if argument.name.value in self.LIST_SIZE_ARGS:
+                value = argument.value
+                if isinstance(value, IntValueNode):
+                    return max(int(value.value), 1)
+                if isinstance(value, VariableNode) and isinstance(variables.get(value.name.value), int):
+                    return max(variables[value.name.value], 1)
+        return settings.GRAPHQL_DEFAULT_LIST_SIZE
+
+
+## Resolver timings → graphql_resolver_duration_seconds{field="Type.field"} on /internal/metrics
+# Only fields with their own resolver function are timed (user, posts, users, ...): plain
+# attribute fields (id, name) are most of the calls and take nanoseconds, timing them would
+# cost more than they do. The decision is cached per Type.field.
+_timed_fields: dict[tuple[str, str], bool] = {}
+
+
+def _has_resolver(info) -> bool:
+    key = (info.parent_type.name, info.field_name)
+    timed = _timed_fields.get(key)
+    if timed is None:
+        field = info.parent_type.fields.get(info.field_name)
+        definition = field.extensions.get("strawberry-definition") if field is not None and field.extensions else None
+        timed = _timed_fields[key] = getattr(definition, "base_resolver", None) is not None
+    return timed
+
+
+class ResolverTimings(SchemaExtension):
+    def resolve(self, _next, root, info, *args, **kwargs):
+        if not _has_resolver(info):
+            return _next(root, info, *args, **kwargs)
+        start = time.perf_counter()
+        result = _next(root, info, *args, **kwargs)
+        if isawaitable(result):
+            return self._timed(result, f"{info.parent_type.name}.{info.field_name}", start)
+        metrics.observe_resolver(f"{info.parent_type.name}.{info.field_name}", (time.perf_counter() - start) * 1000)
+        return result
+
+    async def _timed(self, result, name: str, start: float):
+        try:
+            return await result
+        finally:
+            metrics.observe_resolver(name, (time.perf_counter() - start) * 1000)
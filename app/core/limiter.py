@@ -1,39 +1,233 @@
 # app/core/limiter.py
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from fastapi import Request
+## Rate limiting
+# @limiter.limit("5/minute") on an async endpoint (it must take `request: Request`,
+# TypeError at decoration otherwise).
+# Several limits: "5/minute;100/hour". The key defaults to the client IP; pass
+# key_func=auth.rate_limit_key to limit per logged-in user (JWT `sub`) instead.
+#
+# Algorithm: GCRA (generic cell rate algorithm). Per key we store ONE number, the
+# "theoretical arrival time" (TAT) of the next request. Each request pushes it forward by
+# period/limit; a request is allowed while TAT stays within `period` of now. Same result as
+# a sliding window, without a sorted set of timestamps per client.
+#
+# Storage (RATE_LIMIT_STORAGE):
+#   memory → counters in this worker's memory: each uvicorn worker enforces its own limits,
+#            and they reset on restart (fine for development)
+#   redis  → counters in Redis, shared by every worker and server. The check is a Lua script
+#            (atomic, uses the Redis clock), all limits of a request go in one pipeline
+#            (one round trip), awaited on the event loop. If Redis is unreachable we fall back
+#            to the memory counters for a few seconds instead of failing requests.
+#
+# (slowapi, which this replaces, calls its storage synchronously: with Redis that blocks the
+# event loop for one round trip per limit. The limit strings are parsed here too, so the
+# `limits` package isn't imported at startup anymore.)
+
+import functools
+import inspect
+import re
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request
+from redis.exceptions import RedisError
 from starlette.responses import JSONResponse
-# slowapi is a wrapper around the limits package to make it work nicely with FastAPI/Starlette.
-# limits is the underlying Python library that actually implements rate-limiting logic (counters, storage backends like Redis, Memcached, in-memory, etc.).
-from limits.storage import RedisStorage
 
-## Python in-memory
-# Create a limiter instance (using client IP as the key)
-limiter = Limiter(key_func=get_remote_address)
+from app.core.cache import LocalCache
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.redis import RedisClient, get_redis_client
+
+# KEYS[1] = bucket, ARGV[1] = emission interval (ms), ARGV[2] = period (ms)
+# Returns {allowed (0/1), remaining, retry_after (ms)}
+_GCRA = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call("GET", KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if now < allow_at then
+    return {0, 0, allow_at - now}
+end
+redis.call("SET", KEYS[1], new_tat, "PX", new_tat - now)
+return {1, math.floor((period - (new_tat - now)) / interval), 0}
+"""
+
+
+# Same grammar as the `limits` package (what slowapi accepted): "N/unit", "N per unit",
+# "N/M units", any case, several limits separated by ; , or |
+# (month = 30 days, year = 12 months, as in `limits`)
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400, "month": 2592000, "year": 31104000}
+_LIMIT_RE = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day|month|year)s?\s*$", re.IGNORECASE)
+_SEPARATORS = re.compile(r"[,;|]")
+
+
+# One "N per period" limit, e.g. "5/minute", "100 per hour", "10/30 seconds"
+@dataclass(frozen=True)
+class RateLimit:
+    amount: int
+    period: int     # seconds
+
+    def __str__(self) -> str:   # "5 per 1 minute"
+        unit, seconds = next((u, n) for u, n in reversed(_PERIODS.items()) if self.period % n == 0)
+        return f"{self.amount} per {self.period // seconds} {unit}"
+
+
+def parse_limits(limit_value: str) -> list[RateLimit]:
+    limits = []
+    for part in _SEPARATORS.split(limit_value):
+        match = _LIMIT_RE.match(part)
+        if match is None:
+            raise ValueError(f"Invalid rate limit: {part!r}")
+        amount, multiple, unit = match.groups()
+        limits.append(RateLimit(int(amount), int(multiple or 1) * _PERIODS[unit.lower()]))
+    return limits
+
+
+def get_remote_address(request: Request) -> str:
+    return request.client.host if request.client else "127.0.0.1"
+
+
+class RateLimitExceeded(HTTPException):
+    def __init__(self, limit: str, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail=limit,
+            headers={"Retry-After": str(max(int(retry_after + 0.999), 1))},
+        )
+
 
+class RateLimiter:
+    def __init__(
+        self,
+        key_func=get_remote_address,
+        storage: str = "memory",
+        redis_client: RedisClient | None = None,
+        prefix: str = "ratelimit:",
+        retry_after: float = 5.0,
+        local_maxsize: int = 10000,
+    ):
+        self.key_func = key_func
+        self.storage = storage
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self.retry_after = retry_after
+        self.local = LocalCache(local_maxsize)   # key → TAT (monotonic seconds)
+        self._script = None
+        self._down_until = 0.0
+        self.allowed = 0
+        self.rejected = 0
+        self.fallbacks = 0
 
-## Redis backend memory
-# storage = RedisStorage("redis://localhost:6379")
-# limiter = Limiter(key_func=get_remote_address, storage=storage)
+    # --- storage ---
+
+    def _hit_local(self, key: str, amount: int, period: float) -> tuple[bool, int, float]:
+        interval = period / amount
+        now = time.monotonic()
+        tat = max(self.local.get(key, now), now)
+        new_tat = tat + interval
+        allow_at = new_tat - period
+        if now < allow_at:
+            return False, 0, allow_at - now
+        self.local.set(key, new_tat, new_tat - now)
+        return True, int((period - (new_tat - now)) / interval), 0.0
+
+    async def _hit_redis(self, checks) -> list[tuple[bool, int, float]] | None:
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            client = await self.redis_client.get_client()
+            if self._script is None:
+                self._script = client.register_script(_GCRA)
+            async with client.pipeline(transaction=False) as pipe:
+                for key, amount, period in checks:
+                    period_ms = int(period * 1000)
+                    await self._script(keys=[key], args=[period_ms // amount, period_ms], client=pipe)
+                results = await pipe.execute()
+        except (RedisError, OSError) as exc:
+            self.fallbacks += 1
+            logger.warning("Rate limiter using local counters for %ss: %s", self.retry_after, exc)
+            self._down_until = time.monotonic() + self.retry_after
+            return None
+        return [(bool(allowed), int(remaining), retry_ms / 1000) for allowed, remaining, retry_ms in results]
+
+    # Count one request against every limit; raises RateLimitExceeded if any is exhausted.
+    # (With several limits, a request rejected by one still counts against the others.)
+    async def hit(self, key: str, limits) -> int:
+        checks = [(f"{self.prefix}{key}:{item.amount}/{item.period}", item.amount, item.period) for item in limits]
+        results = None
+        if self.storage == "redis":
+            results = await self._hit_redis(checks)
+        if results is None:
+            results = [self._hit_local(*check) for check in checks]
+
+        for item, (allowed, _, retry_after) in zip(limits, results):
+            if not allowed:
+                self.rejected += 1
+                raise RateLimitExceeded(str(item), retry_after)
+        self.allowed += 1
+        return min(remaining for _, remaining, _ in results)
+
+    # --- decorator ---
+
+    def limit(self, limit_value: str, key_func=None):
+        limits = parse_limits(limit_value)
+
+        def decorator(func):
+            scope = f"{func.__module__}.{func.__qualname__}"
+            # The key comes from the request, so the endpoint must take it: checked here, at
+            # import time, rather than failing on the first call
+            params = list(inspect.signature(func).parameters.values())
+            position = next(
+                (i for i, param in enumerate(params)
+                 if isinstance(param.annotation, type) and issubclass(param.annotation, Request)),
+                None,
+            )
+            if position is None:
+                raise TypeError(f"@limiter.limit: {scope} needs a `request: Request` parameter")
+            name = params[position].name
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request = kwargs[name] if name in kwargs else args[position]
+                if settings.RATE_LIMIT_ENABLED:
+                    key = (key_func or self.key_func)(request)
+                    await self.hit(f"{scope}:{key}", limits)
+                return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> dict:
+        return {
+            "storage": self.storage,
+            "redis_down": time.monotonic() < self._down_until,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "fallbacks": self.fallbacks,
+            "local_keys": self.local.stats()["size"],
+        }
+
+
+limiter = RateLimiter(
+    key_func=get_remote_address,
+    storage=settings.RATE_LIMIT_STORAGE,
+    redis_client=get_redis_client(),
+)
 
 
 # Custom rate limit exceeded response
-def rate_limit_exceeded_handler(request: Request, exc):
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
     return JSONResponse(
         status_code=429,
         content={
             "error": "Too Many Requests",
             "detail": f"Rate limit exceeded: {exc.detail}"
         },
+        headers=exc.headers,
     )
-
-
-# In-memory storage (default)
-# Stores counters inside the Python process memory.
-# Works only if you have one FastAPI process (not good for multi-worker production).
-# If app restarts → counters reset.
-# Redis storage (recommended)
-# Stores counters in Redis (centralized).
-# Works across multiple workers / multiple servers.
-# Survives restarts.
-# Ideal for production.
@@ -3,8 +3,32 @@
 # logger = logging.getLogger("app")
 
 
+## Non-blocking logging pipeline
+# logger.info(...) on a request only puts the record on an in-memory queue; a background
+# thread (QueueListener) formats it and does the slow part: writing the file and the console.
+#
+#   request thread:  logger → sampling filter → DroppingQueueHandler → bounded queue
+#   listener thread: queue → RotatingFileHandler (JSON lines) + StreamHandler (text)
+#
+# - bounded queue: if the writer can't keep up (slow disk, log storm) new records are dropped
+#   and counted instead of growing memory or blocking requests. See /internal/logging.
+# - sampling: LOG_SAMPLING={"sqlalchemy.engine": 0.01} keeps ~1% of that logger's records
+#   below WARNING (hot, chatty paths); warnings and errors are always kept.
+# - rotation: the file is rotated at LOG_MAX_BYTES, LOG_BACKUP_COUNT old files are kept.
+#   Rotation isn't coordinated between processes: with several uvicorn workers, prefer
+#   LOG_CONSOLE_JSON=true and let the platform collect stdout.
+
+import atexit
+import json
 import logging
 import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from app.core.config import settings
 
 # Ensure logs directory exists
 LOG_DIR = os.path.join(os.getcwd(), "logs")
@@ -12,14 +36,110 @@ os.makedirs(LOG_DIR, exist_ok=True)
 
 LOG_FILE = os.path.join(LOG_DIR, "debug.log")
 
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is logged too
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+# One JSON object per line: easy to grep, and to ship to Loki/ELK without parsing rules
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+# Keeps `rate` of the records below WARNING for loggers matching a prefix (and their children)
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        # longest prefix first, so "sqlalchemy.engine.Engine" beats "sqlalchemy"
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                if random.random() < rate:
+                    return True
+                self.sampled_out += 1
+                return False
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.queued = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    # Only what has to happen on the caller's thread: merge args into the message now
+    # (they may be mutated later) and render the traceback. JSON/text formatting is left
+    # to the listener thread.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+        else:
+            with self._lock:
+                self.queued += 1
+
+
+def _build_handlers() -> list[logging.Handler]:
+    file_handler = RotatingFileHandler(
+        LOG_FILE, maxBytes=settings.LOG_MAX_BYTES, backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+    file_handler.setFormatter(JsonFormatter())
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(JsonFormatter() if settings.LOG_CONSOLE_JSON else logging.Formatter(TEXT_FORMAT))
+    return [file_handler, console_handler]
+
+
+_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+queue_handler = DroppingQueueHandler(_queue)
+sampling_filter = SamplingFilter(settings.LOG_SAMPLING)
+queue_handler.addFilter(sampling_filter)
+listener = QueueListener(_queue, *_build_handlers(), respect_handler_level=True)
+
 # Logging configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE),   # Log to file
-        logging.StreamHandler()          # Also log to console
-    ]
-)
+logging.basicConfig(level=settings.LOG_LEVEL, handlers=[queue_handler])
+listener.start()
+# flush what is still queued when the process exits
+atexit.register(listener.stop)
+
+
+def log_stats() -> dict:
+    return {
+        "queued": queue_handler.queued,
+        "dropped": queue_handler.dropped,
+        "sampled_out": sampling_filter.sampled_out,
+        "queue_size": _queue.qsize(),
+        "queue_maxsize": _queue.maxsize,
+    }
+
 
 logger = logging.getLogger("app")
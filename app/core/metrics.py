@@ -0,0 +1,214 @@
+## Request metrics (Prometheus text format on /internal/metrics)
+# Answers "where did the time of this slow request go?":
+#   - per route: latency histogram, status codes, in-flight requests
+#   - per request: DB statements + DB time, Redis round trips + time, CPU pool (bcrypt) time
+#     → histograms, and a Server-Timing response header (visible in the browser devtools)
+#   - per GraphQL resolver: latency histogram (ResolverTimings extension)
+#
+# Cost per request stays small and bounded:
+#   - histograms have fixed bucket arrays, created once per route / resolver
+#     (the label set is bounded: route templates, never raw paths)
+#   - one small __slots__ object per request collects the DB / Redis / pool numbers; the
+#     DB and Redis hooks find it through a contextvar (also visible in threadpool calls)
+#
+# Numbers are per worker process, like the other /internal endpoints.
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+
+# Upper bounds (last bucket is "+Inf")
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ("bounds", "buckets", "count", "total")
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    # Called from the event loop and from threadpool threads. A lost increment under a race
+    # is acceptable for monitoring; a lock on every SQL statement is not.
+    def observe(self, value: float):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+
+# Numbers collected while one request runs
+class RequestStats:
+    __slots__ = ("db_statements", "db_ms", "redis_calls", "redis_ms", "pool_ms")
+
+    def __init__(self):
+        self.db_statements = 0
+        self.db_ms = 0.0
+        self.redis_calls = 0
+        self.redis_ms = 0.0
+        self.pool_ms = 0.0
+
+
+current_request: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar("current_request", default=None)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()   # only taken when a new label set appears
+        self.in_flight = 0
+        self.requests: dict[tuple[str, str], Histogram] = {}        # (method, route) → latency
+        self.statuses: dict[tuple[str, str, int], int] = {}        # (method, route, status) → count
+        self.db_statement_ms = Histogram()
+        self.redis_call_ms = Histogram()
+        self.request_db_statements = Histogram(COUNT_BUCKETS)
+        self.request_db_ms = Histogram()
+        self.request_redis_calls = Histogram(COUNT_BUCKETS)
+        self.request_redis_ms = Histogram()
+        self.request_pool_ms = Histogram()
+        self.resolvers: dict[str, Histogram] = {}                  # "Type.field" → latency
+
+    def _histogram(self, table: dict, key) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(key, Histogram())
+        return histogram
+
+    # --- hooks ---
+
+    def observe_db(self, ms: float):
+        self.db_statement_ms.observe(ms)
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_statements += 1
+            stats.db_ms += ms
+
+    def observe_redis(self, ms: float):
+        self.redis_call_ms.observe(ms)
+        stats = current_request.get()
+        if stats is not None:
+            stats.redis_calls += 1
+            stats.redis_ms += ms
+
+    def observe_pool(self, ms: float):
+        stats = current_request.get()
+        if stats is not None:
+            stats.pool_ms += ms
+
+    def observe_resolver(self, name: str, ms: float):
+        self._histogram(self.resolvers, name).observe(ms)
+
+    def observe_request(self, method: str, route: str, status: int, ms: float, stats: RequestStats):
+        self._histogram(self.requests, (method, route)).observe(ms)
+        key = (method, route, status)
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        self.request_db_statements.observe(stats.db_statements)
+        self.request_db_ms.observe(stats.db_ms)
+        self.request_redis_calls.observe(stats.redis_calls)
+        self.request_redis_ms.observe(stats.redis_ms)
+        self.request_pool_ms.observe(stats.pool_ms)
+
+    # --- exposition ---
+
+    def render(self) -> str:
+        lines = [
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.statuses.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+        _render_histograms(lines, "http_request_duration_seconds", {
+            f'method="{method}",route="{route}"': histogram for (method, route), histogram in sorted(self.requests.items())
+        }, seconds=True)
+        _render_histograms(lines, "db_statement_duration_seconds", {"": self.db_statement_ms}, seconds=True)
+        _render_histograms(lines, "redis_call_duration_seconds", {"": self.redis_call_ms}, seconds=True)
+        _render_histograms(lines, "http_request_db_statements", {"": self.request_db_statements})
+        _render_histograms(lines, "http_request_db_seconds", {"": self.request_db_ms}, seconds=True)
+        _render_histograms(lines, "http_request_redis_calls", {"": self.request_redis_calls})
+        _render_histograms(lines, "http_request_redis_seconds", {"": self.request_redis_ms}, seconds=True)
+        _render_histograms(lines, "http_request_cpu_pool_seconds", {"": self.request_pool_ms}, seconds=True)
+        _render_histograms(lines, "graphql_resolver_duration_seconds", {
+            f'field="{name}"': histogram for name, histogram in sorted(self.resolvers.items())
+        }, seconds=True)
+        return "\n".join(lines) + "\n"
+
+
+def _render_histograms(lines: list[str], name: str, histograms: dict[str, Histogram], seconds: bool = False):
+    scale = 1000 if seconds else 1
+    lines.append(f"# TYPE {name} histogram")
+    for labels, histogram in histograms.items():
+        prefix = f"{labels}," if labels else ""
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.buckets):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound / scale:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram.total / scale:.6f}")
+        lines.append(f"{name}_count{suffix} {histogram.count}")
+
+
+metrics = Metrics()
+
+
+## ASGI middleware (pure ASGI: no BaseHTTPMiddleware task/stream wrapping on every request)
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+        metrics.in_flight += 1
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                app_ms = (time.perf_counter() - start) * 1000
+                server_timing = (
+                    f"db;dur={stats.db_ms:.1f};desc=\"{stats.db_statements} statements\", "
+                    f"redis;dur={stats.redis_ms:.1f};desc=\"{stats.redis_calls} calls\", "
+                    f"cpu;dur={stats.pool_ms:.1f}, app;dur={app_ms:.1f}"
+                )
+                message["headers"] = [*message.get("headers", ()), (b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.in_flight -= 1
+            current_request.reset(token)
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"],
+                route.path if route is not None else "<unmatched>",
+                status,
+                (time.perf_counter() - start) * 1000,
+                stats,
+            )
+
+
+## SQLAlchemy hooks: time every statement (cursor execute) of an Engine.
+# For an AsyncEngine pass async_engine.sync_engine.
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("query_start", None)
+        if start is not None:
+            metrics.observe_db((time.perf_counter() - start) * 1000)
@@ -0,0 +1,45 @@
+## Keyset (cursor) pagination helpers
+# OFFSET pagination makes Postgres read and throw away every skipped row,
+# so page 1000 is ~1000x slower than page 1. Keyset pagination remembers the last
+# key seen and asks for "WHERE id > :last_id ORDER BY id LIMIT n" instead, which is
+# a single index range scan no matter how deep the page is.
+#
+# The cursor sent to clients is opaque (base64 JSON), so we can change what's inside
+# (e.g. add a sort key) without breaking them.
+
+import base64
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(**values) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values
+
+
+# Row count estimate from the planner statistics (pg_class.reltuples).
+# Free compared to SELECT count(*), which scans the whole table.
+# reltuples is -1 until the table has been VACUUM/ANALYZEd once → fall back to an exact count.
+async def estimate_count(db: AsyncSession, model) -> int:
+    table = model.__table__.name
+    estimate = await db.scalar(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table},
+    )
+    if estimate is None or estimate < 0:
+        return await db.scalar(select(func.count()).select_from(model))
+    return int(estimate)
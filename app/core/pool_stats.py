@@ -0,0 +1,129 @@
+## Connection pool statistics
+# Counters + histograms for one SQLAlchemy pool, fed by pool events,
+# so the pool size per uvicorn worker can be tuned from data instead of guessed.
+#
+# - checkout wait  → time spent in pool.connect() (waiting for a free connection,
+#                    pre-ping, or opening a new one when the pool is empty)
+# - connect        → time to open a brand new DBAPI connection (do_connect → connect events)
+# - checked out / overflow → read live from the pool itself
+
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event, exc
+
+# Histogram upper bounds in milliseconds (last bucket is "+Inf")
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.connects = 0
+        self.connect_ms_total = 0.0
+        self.connect_ms_max = 0.0
+        self.pool = None  # set by instrument()
+
+    def observe_wait(self, ms: float):
+        with self._lock:
+            self.wait_ms_total += ms
+            self.wait_ms_max = max(self.wait_ms_max, ms)
+            self.wait_buckets[bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+
+    def observe_connect(self, ms: float):
+        with self._lock:
+            self.connects += 1
+            self.connect_ms_total += ms
+            self.connect_ms_max = max(self.connect_ms_max, ms)
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        with self._lock:
+            waits = sum(self.wait_buckets)
+            return {
+                "pool": type(pool).__name__ if pool is not None else None,
+                "size": pool.size() if pool is not None else None,
+                "checked_out": pool.checkedout() if pool is not None else None,
+                "checked_in": pool.checkedin() if pool is not None else None,
+                "overflow": pool.overflow() if pool is not None else None,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "count": waits,
+                    "avg": round(self.wait_ms_total / waits, 3) if waits else 0.0,
+                    "max": round(self.wait_ms_max, 3),
+                    "buckets": {
+                        **{f"le_{b}": n for b, n in zip(WAIT_BUCKETS_MS, self.wait_buckets)},
+                        "le_inf": self.wait_buckets[-1],
+                    },
+                },
+                "connect_ms": {
+                    "count": self.connects,
+                    "avg": round(self.connect_ms_total / self.connects, 3) if self.connects else 0.0,
+                    "max": round(self.connect_ms_max, 3),
+                },
+            }
+
+
+# Pool subclass that times pool.connect() (the checkout wait).
+# Created per engine with `stats` as a class attribute, so pool.recreate()
+# (which calls self.__class__(...)) keeps reporting into the same PoolStats.
+def instrumented_pool(pool_cls, stats: PoolStats):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return pool_cls.connect(self)
+        except exc.TimeoutError:
+            with stats._lock:
+                stats.timeouts += 1
+            raise
+        finally:
+            stats.observe_wait((time.perf_counter() - start) * 1000)
+
+    return type(
+        f"Instrumented{pool_cls.__name__}",
+        (pool_cls,),
+        {"connect": connect, "stats": stats, "__module__": pool_cls.__module__},
+    )
+
+
+# Attach the event listeners to a (sync) Engine.
+# For an AsyncEngine pass async_engine.sync_engine.
+def instrument(engine, stats: PoolStats):
+    stats.pool = engine.pool
+
+    @event.listens_for(engine, "do_connect")
+    def _before_connect(dialect, conn_rec, cargs, cparams):
+        conn_rec.info["connect_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, conn_rec):
+        start = conn_rec.info.pop("connect_start", None)
+        if start is not None:
+            stats.observe_connect((time.perf_counter() - start) * 1000)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, conn_rec, conn_proxy):
+        with stats._lock:
+            stats.checkouts += 1
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, conn_rec):
+        with stats._lock:
+            stats.checkins += 1
+
+    # engine.dispose() swaps in a new pool object
+    @event.listens_for(engine, "engine_disposed")
+    def _on_dispose(engine_):
+        stats.pool = engine.pool
+
+    return stats
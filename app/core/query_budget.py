@@ -0,0 +1,132 @@
+## Slow-query detector + per-request query budget (opt-in: QUERY_BUDGET_ENABLED=true)
+# Every SQL statement is reduced to a fingerprint (literals and bind parameters → ?,
+# IN lists → (?...)), so "SELECT ... WHERE user_id = 1" and "... = 2" count as the same
+# statement. Per request we keep count + time per fingerprint:
+#   - a statement slower than SLOW_QUERY_MS is logged on its own
+#   - a request over QUERY_BUDGET_MAX_STATEMENTS or QUERY_BUDGET_MAX_MS logs its top
+#     fingerprints: the same SELECT 50 times in one request is an N+1
+#
+# Tests: the `query_budget` fixture in tests/conftest.py uses record_queries() to fail a test
+# that issues more statements than it declares, so regressions fail CI, not production.
+
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.logging import logger
+
+_PARAMS = re.compile(r"\$\d+|%\(\w+\)s|%s|\?|:\w+|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    normalized = _PARAMS.sub("?", statement)
+    normalized = _LISTS.sub("(?...)", normalized)
+    return _SPACES.sub(" ", normalized).strip()
+
+
+class QueryLog:
+    def __init__(self):
+        self.statements = 0
+        self.total_ms = 0.0
+        self.by_fingerprint: dict[str, list] = {}   # fingerprint → [count, total ms]
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, ms: float):
+        key = fingerprint(statement)
+        with self._lock:
+            self.statements += 1
+            self.total_ms += ms
+            entry = self.by_fingerprint.get(key)
+            if entry is None:
+                self.by_fingerprint[key] = [1, ms]
+            else:
+                entry[0] += 1
+                entry[1] += ms
+
+    # Most repeated first (N+1), then slowest
+    def top(self, n: int = 5) -> list[dict]:
+        with self._lock:
+            entries = sorted(self.by_fingerprint.items(), key=lambda item: (-item[1][0], -item[1][1]))[:n]
+        return [{"count": count, "ms": round(ms, 2), "sql": sql} for sql, (count, ms) in entries]
+
+
+# The request's log (set by QueryBudgetMiddleware) + logs opened with record_queries()
+_request_log: contextvars.ContextVar[QueryLog | None] = contextvars.ContextVar("query_log", default=None)
+_recorders: list[QueryLog] = []
+
+
+## Engine hooks
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_budget_start"] = time.perf_counter()
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("query_budget_start", None)
+    if start is None:
+        return
+    ms = (time.perf_counter() - start) * 1000
+    if ms >= settings.SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", ms, fingerprint(statement), extra={"query_ms": round(ms, 2)})
+    log = _request_log.get()
+    if log is not None:
+        log.record(statement, ms)
+    for recorder in _recorders:
+        recorder.record(statement, ms)
+
+
+# For an AsyncEngine pass async_engine.sync_engine. Safe to call twice on the same engine
+# (the test fixture installs on engines the app may already have hooked).
+def install(engine):
+    if not event.contains(engine, "after_cursor_execute", _after):
+        event.listen(engine, "before_cursor_execute", _before)
+        event.listen(engine, "after_cursor_execute", _after)
+
+
+# Collect every statement run (on any thread / task) inside the block:
+#   with record_queries() as log: ...
+#   log.statements, log.total_ms, log.top()
+@contextmanager
+def record_queries():
+    log = QueryLog()
+    _recorders.append(log)
+    try:
+        yield log
+    finally:
+        _recorders.remove(log)
+
+
+## ASGI middleware: one QueryLog per request, checked against the budget at the end
+class QueryBudgetMiddleware:
+    def __init__(self, app, max_statements: int | None = None, max_ms: float | None = None):
+        self.app = app
+        self.max_statements = max_statements if max_statements is not None else settings.QUERY_BUDGET_MAX_STATEMENTS
+        self.max_ms = max_ms if max_ms is not None else settings.QUERY_BUDGET_MAX_MS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        log = QueryLog()
+        token = _request_log.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_log.reset(token)
+            if log.statements > self.max_statements or log.total_ms > self.max_ms:
+                route = scope.get("route")
+                logger.warning(
+                    "Query budget exceeded on %s %s: %d statements, %.1f ms",
+                    scope["method"],
+                    route.path if route is not None else scope["path"],
+                    log.statements,
+                    log.total_ms,
+                    extra={"query_top": log.top()},
+                )
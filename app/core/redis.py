@@ -1,6 +1,34 @@
+import time
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
 from functools import lru_cache
 from fastapi import Depends
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+# Redis client that reports every round trip (a command, or a whole pipeline) to
+# /internal/metrics and the request's Server-Timing header.
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            metrics.observe_redis((time.perf_counter() - start) * 1000)
+
+
+class InstrumentedRedis(redis.Redis):
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            metrics.observe_redis((time.perf_counter() - start) * 1000)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
 
 class RedisClient:
     def __init__(self, url: str = "redis://localhost:6379/0"):
@@ -9,14 +37,19 @@ class RedisClient:
 
     async def get_client(self) -> redis.Redis:
         if self._client is None:
-            self._client = redis.from_url(self._url, decode_responses=True)
+            self._client = InstrumentedRedis.from_url(self._url, decode_responses=True)
         return self._client
 
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
 
 # Singleton-style usage
 @lru_cache
 def get_redis_client() -> RedisClient:
-    return RedisClient()
+    return RedisClient(settings.REDIS_URL)
 
 # we often use it for global config so the object is created only once:
 # What is @lru_cache and How It Works?
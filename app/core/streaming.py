@@ -0,0 +1,68 @@
+## Streaming responses
+# NDJSON = one JSON document per line. The client can process each line as soon as it
+# arrives, and neither side ever holds the whole payload in memory.
+
+import csv
+import io
+from typing import AsyncIterable, Sequence
+
+import orjson
+from starlette.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+# orjson: bytes out, newline appended by the encoder itself
+async def ndjson_lines(items: AsyncIterable[dict]):
+    async for item in items:
+        yield orjson.dumps(item, default=str, option=orjson.OPT_APPEND_NEWLINE)
+
+
+# StreamingResponse for endpoints that are still reading the request body while they
+# answer (upload in, results out).
+# Starlette's StreamingResponse runs a task that calls receive() to watch for a client
+# disconnect (ASGI servers older than spec 2.4); that task would swallow body chunks the
+# endpoint has not read yet. Here the body reader is the only receive() caller: a client
+# that goes away shows up as a ClientDisconnect from request.stream() or a failed send.
+class DuplexStreamingResponse(StreamingResponse):
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+## Exports
+# Input: batches of row mappings (AsyncResult.mappings().partitions(), from a server-side
+# cursor). Each batch becomes ONE chunk of the response body: a send per row would cost
+# more than the serialisation itself. Memory stays at one batch, whatever the table size.
+
+async def ndjson_chunks(batches: AsyncIterable[Sequence]):
+    async for rows in batches:
+        yield b"".join(orjson.dumps(dict(row), default=str, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+async def csv_chunks(batches: AsyncIterable[Sequence], columns: Sequence[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in batches:
+        writer.writerows([row[column] for column in columns] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():   # no rows at all: still send the header
+        yield buffer.getvalue()
+
+
+def export_response(batches: AsyncIterable[Sequence], columns: Sequence[str], fmt: str, filename: str):
+    if fmt == "csv":
+        body, media_type = csv_chunks(batches, columns), CSV_MEDIA_TYPE
+    else:
+        body, media_type = ndjson_chunks(batches), NDJSON_MEDIA_TYPE
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,21 @@
+# app/domain/post/graphql/loaders.py
+import asyncio
+from collections import defaultdict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from strawberry.dataloader import DataLoader
+from app.domain.post.models import Post
+
+
+# user id → that user's posts (one query for all the users in the response)
+def posts_by_user_id_loader(db: AsyncSession, db_lock: asyncio.Lock) -> DataLoader[int, list[Post]]:
+    async def load(user_ids: list[int]) -> list[list[Post]]:
+        stmt = select(Post).where(Post.user_id.in_(user_ids)).order_by(Post.id)
+        async with db_lock:
+            posts = (await db.execute(stmt)).scalars().all()
+        by_user: dict[int, list[Post]] = defaultdict(list)
+        for post in posts:
+            by_user[post.user_id].append(post)
+        return [by_user.get(user_id, []) for user_id in user_ids]
+
+    return DataLoader(load_fn=load)
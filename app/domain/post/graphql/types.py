@@ -0,0 +1,39 @@
+# app/domain/post/graphql/types.py
+from typing import TYPE_CHECKING, Annotated
+import strawberry
+from strawberry.types import Info
+
+if TYPE_CHECKING:
+    from app.domain.user.graphql.types import UserType
+
+
+# GraphQL types
+@strawberry.type
+class PostType:
+    id: int
+    title: str
+    content: str
+    user_id: int | None = None
+
+    @classmethod
+    def from_instance(cls, post) -> "PostType":
+        return cls(id=post.id, title=post.title, content=post.content, user_id=post.user_id)
+
+    # Author, batched through the per-request users_by_id loader
+    @strawberry.field
+    async def user(
+        self, info: Info
+    ) -> Annotated["UserType", strawberry.lazy("app.domain.user.graphql.types")] | None:
+        from app.domain.user.graphql.types import UserType
+
+        if self.user_id is None:
+            return None
+        user = await info.context["loaders"].users_by_id.load(self.user_id)
+        return UserType.from_instance(user) if user else None
+
+
+# One page of a keyset-paginated post list; pass next_cursor back as `after`
+@strawberry.type
+class PostPage:
+    items: list[PostType]
+    next_cursor: str | None = None
@@ -1,7 +1,12 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Index, Integer, String, ForeignKey
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from app.core.database import Base
 
+# Text search configuration used for the search_vector column AND for the queries:
+# both sides must stem words the same way ("running" → "run").
+SEARCH_CONFIG = "english"
+
 
 class Post(Base):
     __tablename__ = "posts"
@@ -11,6 +16,33 @@ class Post(Base):
     content = Column(String)
     user_id = Column(Integer, ForeignKey("users.id"))
 
+    # Full-text search document, computed by Postgres on every INSERT/UPDATE (generated column,
+    # never written by us). Title words weigh more (A) than content words (B) in the ranking.
+    # deferred(raiseload=True): it's never loaded with the row (it's big and only used in
+    # WHERE/ORDER BY), and reading post.search_vector raises instead of querying.
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'B')",
+                persisted=True,
+            ),
+        ),
+        raiseload=True,
+    )
+
+    # GIN index: maps every lexeme to the posts containing it, so `search_vector @@ query`
+    # is an index lookup instead of parsing the text of every row.
+    # (user_id, id DESC): "posts of user X, newest first, after cursor Y" is one index range
+    # scan that stops after LIMIT rows (user feed). Also serves every WHERE user_id = ... lookup.
+    __table_args__ = (
+        Index("ix_posts_search_vector", search_vector, postgresql_using="gin"),
+        Index("ix_posts_user_id_id", user_id, id.desc()),
+    )
+
     # relationship("User", back_populates="posts") does NOT change the table schema.
     # It adds a Python-level object relationship so you can navigate between objects without writing manual JOINs.
-    user_ref = relationship("User", back_populates="post_ref")  # Many-to-one
+    # lazy="raise_on_sql": touching post.user_ref when it isn't loaded yet raises instead of
+    # silently running one query per post (N+1). Load it explicitly with selectinload()/joinedload().
+    user_ref = relationship("User", back_populates="post_ref", lazy="raise_on_sql")  # Many-to-one
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, TypeAdapter
 
 
 class BasePost(BaseModel):
@@ -13,3 +14,15 @@ class GetPost(BasePost):
     user_id: int
     class Config:
         from_attributes = True
+
+class PostSearchResult(GetPost):
+    rank: Optional[float] = None    # relevance, only set when searching with ?q=
+
+class PostSearchPage(BaseModel):
+    data: List[PostSearchResult]
+    next_cursor: Optional[str] = None   # pass back as ?cursor= to get the next page
+
+
+# Precompiled serializers for the list responses (app/core/serialization.py)
+post_list_adapter = TypeAdapter(List[GetPost])
+post_search_page_adapter = TypeAdapter(PostSearchPage)
@@ -1,16 +1,20 @@
+from typing import List, Optional, Tuple
 from fastapi import HTTPException
+from sqlalchemy import func, null, select, tuple_
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.domain.post import schema, models
+from app.core.config import settings
 
 # Create Post
 def create_post(db: Session, post:schema.CreatePost):
     db_post = db.query(models.Post).filter(models.Post.title == post.title).first()
     if db_post:
-        raise HTTPException(status_code=404, detail="post alreay exist.")
+        raise HTTPException(status_code=400, detail="Post already exist.")
     new_post = models.Post(
         title = post.title,
         content = post.content,
-        user_id = 1
+        user_id = post.user_id
     )
     db.add(new_post)
     db.commit()
@@ -25,3 +29,112 @@ def get_post(db:Session, id:int):
     return post
 
 
+## Async services (AsyncSession)
+
+# Create Post
+async def create_post_async(db: AsyncSession, post: schema.CreatePost):
+    result = await db.execute(select(models.Post.id).where(models.Post.title == post.title))
+    if result.first():
+        raise HTTPException(status_code=400, detail="Post already exist.")
+    new_post = models.Post(
+        title = post.title,
+        content = post.content,
+        user_id = post.user_id
+    )
+    db.add(new_post)
+    await db.commit()
+    await db.refresh(new_post)
+
+    return new_post
+
+
+# Get Post
+async def get_post_async(db: AsyncSession, id: int):
+    return await db.get(models.Post, id)
+
+
+## Batch APIs
+# A page that shows 30 posts used to make 30 HTTP calls (and 30 queries).
+# These do the same work with one statement per step.
+
+# Create many posts in ONE transaction: either all of them are stored or none.
+# One IN query checks every title at once instead of one lookup per post.
+async def create_posts_async(db: AsyncSession, posts: List[schema.CreatePost]) -> List[models.Post]:
+    titles = [post.title for post in posts]
+    duplicates = sorted({title for title in titles if titles.count(title) > 1})
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Duplicate titles in batch: {duplicates}")
+
+    result = await db.execute(select(models.Post.title).where(models.Post.title.in_(titles)))
+    existing = sorted(result.scalars())
+    if existing:
+        raise HTTPException(status_code=400, detail=f"Posts already exist: {existing}")
+
+    new_posts = [
+        models.Post(title=post.title, content=post.content, user_id=post.user_id)
+        for post in posts
+    ]
+    db.add_all(new_posts)
+    # flush → one batched INSERT ... RETURNING id for the whole list (no refresh per row)
+    await db.flush()
+    await db.commit()
+
+    return new_posts
+
+
+# Fetch many posts with one IN query, returned in the order the ids were asked for.
+# Unknown ids are skipped; a repeated id is returned once.
+async def get_posts_async(db: AsyncSession, ids: List[int]) -> List[models.Post]:
+    ids = list(dict.fromkeys(ids))
+    result = await db.execute(select(models.Post).where(models.Post.id.in_(ids)))
+    by_id = {post.id: post for post in result.scalars()}
+    return [by_id[id] for id in ids if id in by_id]
+
+
+# Export: every post in id order, batches of `batch_size` rows from a server-side cursor
+# (see services.stream_users_async in the user domain).
+async def stream_posts_async(db: AsyncSession, after_id: int | None = None, batch_size: int = settings.EXPORT_BATCH_SIZE):
+    stmt = (
+        select(models.Post.id, models.Post.title, models.Post.content, models.Post.user_id)
+        .order_by(models.Post.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if after_id is not None:
+        stmt = stmt.where(models.Post.id > after_id)
+    result = await db.stream(stmt)
+    async for rows in result.mappings().partitions():
+        yield rows
+
+
+## Listing + full-text search
+# q=None → newest posts first, keyset on id.
+# q="..." → posts whose search_vector matches, best first, keyset on (rank, id).
+#   websearch_to_tsquery accepts what people type in a search box: words, "quoted phrases",
+#   -excluded, or. The match is a GIN index lookup (ix_posts_search_vector, created with
+#   posts.search_vector by migration 3f9a6c1e2b47).
+# `after` is the decoded cursor of the previous page: {"id": ...} or {"rank": ..., "id": ...}.
+# Returns ([(post, rank or None)], has_more); fetches one extra row to know about a next page.
+async def search_posts_async(
+        db: AsyncSession,
+        q: Optional[str] = None,
+        after: Optional[dict] = None,
+        page_size: int = settings.DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[tuple], bool]:
+    if q:
+        query = func.websearch_to_tsquery(models.SEARCH_CONFIG, q)
+        rank = func.ts_rank_cd(models.Post.search_vector, query)
+        stmt = (
+            select(models.Post, rank.label("rank"))
+            .where(models.Post.search_vector.bool_op("@@")(query))
+            .order_by(rank.desc(), models.Post.id.desc())
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(rank, models.Post.id) < tuple_(after["rank"], after["id"]))
+    else:
+        stmt = select(models.Post, null().label("rank")).order_by(models.Post.id.desc())
+        if after is not None:
+            stmt = stmt.where(models.Post.id < after["id"])
+
+    result = await db.execute(stmt.limit(page_size + 1))
+    rows = [tuple(row) for row in result.all()]
+    return rows[:page_size], len(rows) > page_size
@@ -1,19 +1,108 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.domain.post import schema
 from app.domain.post import services
-from app.core.database import get_db
+from app.core import database
+from app.core.database import get_async_db
+from app.core.config import settings
+from app.core import pagination
+from app.core.streaming import EXPORT_FORMATS, export_response
 from app.core.logging import logger
+from app.core.cache import cached
+from app.core.serialization import json_response
+from app.domain.user.utils import auth
 
 router = APIRouter(prefix='/post', tags=['Post'])
 
+# Upper bound for the batch endpoints (one request must not turn into an unbounded query)
+MAX_BATCH_SIZE = 100
+
 # Create Post
+# A title that is already taken → 400, here and in /batch (same as a taken email for users)
 @router.post('/', response_model=schema.GetPost)
-def create_post(post: schema.CreatePost, db: Session = Depends(get_db)):
+async def create_post(post: schema.CreatePost, db: AsyncSession = Depends(get_async_db)):
     logger.info("Post Created")
-    return services.create_post(db, post)
+    return await services.create_post_async(db, post)
+
+# Create many posts in one transaction
+# 400 if a title repeats within the batch or already exists; nothing is stored then.
+@router.post('/batch', response_model=List[schema.GetPost])
+async def create_posts(posts: List[schema.CreatePost], db: AsyncSession = Depends(get_async_db)):
+    if not posts or len(posts) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {MAX_BATCH_SIZE} posts.")
+    logger.info("%s Posts Created", len(posts))
+    return json_response(schema.post_list_adapter, await services.create_posts_async(db, posts))
+
+# Get many posts: GET /api/post?ids=3,1,2 → [post 3, post 1, post 2]
+# Path '' (not '/') so /api/post?ids= is served directly instead of redirecting to /api/post/
+@router.get('', response_model=List[schema.GetPost])
+async def get_posts(
+    ids: str = Query(..., description="Comma separated post ids"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        post_ids = [int(id) for id in ids.split(",") if id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma separated integers.")
+    if not post_ids or len(post_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Ask for between 1 and {MAX_BATCH_SIZE} ids.")
+    return json_response(schema.post_list_adapter, await services.get_posts_async(db, post_ids))
+
+# Export all posts as NDJSON or CSV (?format=csv), streamed from a server-side cursor.
+# Declared before '/{post_id}'. Admins only and own session, see export_users in the user routes.
+@router.get('/export')
+async def export_posts(
+    fmt: str = Query("ndjson", alias="format", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    after_id: int | None = Query(None, ge=0),
+    current_user: auth.Principal = Depends(auth.get_admin_user),
+):
+    async def batches():
+        async with database.AsyncSessionLocal() as db:
+            async for rows in services.stream_posts_async(db, after_id):
+                yield rows
+
+    logger.info("Post export (%s) by user %s", fmt, current_user.id)
+    return export_response(batches(), ("id", "title", "content", "user_id"), fmt, "posts")
+
+# Listing + full-text search, keyset paginated (same cost for every page)
+#   GET /api/post/search                     → newest posts first
+#   GET /api/post/search?q=fastapi -flask    → matching posts, most relevant first
+# Every response carries next_cursor; pass it back as ?cursor= (with the same q).
+# ?q= needs migration 3f9a6c1e2b47 (posts.search_vector + its GIN index): alembic upgrade head.
+@router.get('/search', response_model=schema.PostSearchPage)
+async def search_posts(
+    q: str | None = Query(None, max_length=200),
+    cursor: str | None = Query(None),
+    page_size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    q = q.strip() if q else None
+    after = pagination.decode_cursor(cursor) if cursor else None
+    if after is not None and not (
+        isinstance(after.get("id"), int) and (not q or isinstance(after.get("rank"), (int, float)))
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    rows, has_more = await services.search_posts_async(db, q, after, page_size)
+
+    next_cursor = None
+    if has_more:
+        last_post, last_rank = rows[-1]
+        next_cursor = pagination.encode_cursor(rank=last_rank, id=last_post.id) if q else pagination.encode_cursor(id=last_post.id)
+    return json_response(schema.post_search_page_adapter, {
+        "data": [
+            {"id": post.id, "title": post.title, "content": post.content, "user_id": post.user_id, "rank": rank}
+            for post, rank in rows
+        ],
+        "next_cursor": next_cursor,
+    })
 
 # Get Post
 @router.get('/{post_id}', response_model=schema.GetPost)
-def get_post(post_id:int, db: Session = Depends(get_db)):
-    return services.get_post(db, post_id)
+@cached("post:{post_id}", ttl=60, local_ttl=5, model=schema.GetPost)
+async def get_post(post_id:int, db: AsyncSession = Depends(get_async_db)):
+    post = await services.get_post_async(db, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post does not exist.")
+    return post
@@ -0,0 +1,200 @@
+## Bulk user import (POST /api/v2/user/bulk)
+# The request body is NDJSON (one user object per line) or CSV (header row + one user per
+# line, no newlines inside quoted fields). It is read as a stream and handled in chunks of
+# BULK_IMPORT_CHUNK_SIZE rows, so a 500k-row file never sits in memory. Per chunk:
+#   1. validate every row with schema.createUser
+#   2. drop emails seen earlier in the file, then ONE query for emails already in the table
+#   3. hash the passwords in the process pool, a few per job (hash_passwords_async)
+#   4. ONE multi-row INSERT ... ON CONFLICT (email) DO NOTHING RETURNING email + COMMIT
+# instead of SELECT + INSERT + COMMIT + REFRESH per row.
+#
+# Results are streamed back as NDJSON while the upload is still going:
+#   {"row": 7, "email": "...", "errors": [...]}       a rejected row (row = data row, 1-based)
+#   {"progress": {"rows": 1000, "inserted": 990, ...}}  after each chunk
+#   {"summary": {...}}                                 last line
+# Committed chunks stay committed if a later chunk (or the client) fails. The status code is
+# sent with the first line, so a failure after that (hashing pool saturated, database error)
+# is reported in the body: the failed chunk is rolled back, an {"error": ...} line follows,
+# and the summary counts only what was committed. Re-running the same file is safe:
+# emails that made it in are rejected as "Email already exist.".
+#
+# bcrypt is deliberately slow (~250ms per password), so plaintext imports are bound by
+# (cores - 1) x 4 hashes/sec: one pool worker stays free for logins and sign-ups. With ?prehashed=true the `password` column must already hold bcrypt
+# hashes (migrating from another system) and step 3 is skipped; that path does >10k rows/sec.
+
+import codecs
+import csv
+import json
+from typing import AsyncIterable, AsyncIterator
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.logging import logger
+from app.domain.user import models, schema
+from app.domain.user.utils.auth import hash_passwords_async
+from app.domain.user.utils.hashing import is_password_hash
+
+# INSERT ... ON CONFLICT DO NOTHING is dialect specific (SQLite: tests and the load test)
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+# bytes chunks (any size, split anywhere, even inside a UTF-8 character) → text lines
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+# lines → (row number, record or None, error or None); blank lines are skipped
+async def iter_records(lines: AsyncIterable[str], fmt: str):
+    header = None
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row += 1
+            if len(values) != len(header):
+                yield row, None, f"Expected {len(header)} columns, got {len(values)}."
+            else:
+                yield row, dict(zip(header, values)), None
+        else:
+            row += 1
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield row, None, f"Invalid JSON: {exc}"
+                continue
+            if isinstance(record, dict):
+                yield row, record, None
+            else:
+                yield row, None, "Expected a JSON object."
+
+
+async def _chunks(records, size: int):
+    chunk = []
+    async for item in records:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _row_error(row: int, errors, email=None) -> dict:
+    if isinstance(errors, str):
+        errors = [{"loc": [], "msg": errors}]
+    return {"row": row, "email": email, "errors": errors}
+
+
+class BulkUserImport:
+    def __init__(self, db: AsyncSession, prehashed: bool = False, chunk_size: int | None = None):
+        self.db = db
+        self.prehashed = prehashed
+        self.chunk_size = chunk_size or settings.BULK_IMPORT_CHUNK_SIZE
+        self.seen_emails: set[str] = set()
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+
+    def counters(self) -> dict:
+        return {"rows": self.rows, "inserted": self.inserted, "failed": self.failed}
+
+    async def run(self, body: AsyncIterable[bytes], fmt: str) -> AsyncIterator[dict]:
+        try:
+            async for chunk in _chunks(iter_records(iter_lines(body), fmt), self.chunk_size):
+                async for line in self._import_chunk(chunk):
+                    yield line
+                yield {"progress": self.counters()}
+        except UnicodeDecodeError as exc:
+            yield {"error": f"Body is not valid UTF-8: {exc}"}
+        except HTTPException as exc:   # hashing pool saturated: stop, keep what is committed
+            yield {"error": exc.detail}
+        except SQLAlchemyError:
+            logger.exception("Bulk user import: database error after %s rows", self.rows)
+            await self.db.rollback()
+            yield {"error": "Database error, import stopped. Rows counted as inserted are committed."}
+        finally:
+            if self.inserted:
+                await response_cache.bump_version("users")
+            logger.info("Bulk user import: %s", self.counters())
+        yield {"summary": self.counters()}
+
+    async def _import_chunk(self, chunk) -> AsyncIterator[dict]:
+        self.rows += len(chunk)
+        valid: list[tuple[int, schema.createUser]] = []
+        rejected: list[dict] = []
+
+        # 1. validation + duplicates inside the file
+        for row, record, error in chunk:
+            if error is not None:
+                rejected.append(_row_error(row, error))
+                continue
+            try:
+                user = schema.createUser.model_validate(record)
+            except ValidationError as exc:
+                errors = [{"loc": list(e["loc"]), "msg": e["msg"]} for e in exc.errors()]
+                rejected.append(_row_error(row, errors, record.get("email")))
+                continue
+            if self.prehashed and not is_password_hash(user.password):
+                rejected.append(_row_error(row, "password is not a bcrypt hash.", user.email))
+            elif user.email in self.seen_emails:
+                rejected.append(_row_error(row, "Duplicate email in this import.", user.email))
+            else:
+                self.seen_emails.add(user.email)
+                valid.append((row, user))
+
+        # 2. one set-based lookup instead of one SELECT per row
+        if valid:
+            result = await self.db.execute(
+                select(models.User.email).where(models.User.email.in_([user.email for _, user in valid]))
+            )
+            existing = set(result.scalars())
+            if existing:
+                rejected += [_row_error(row, "Email already exist.", user.email) for row, user in valid if user.email in existing]
+                valid = [(row, user) for row, user in valid if user.email not in existing]
+
+        # 3. + 4. hash in parallel, insert in one statement
+        if valid:
+            passwords = [user.password for _, user in valid]
+            if not self.prehashed:
+                passwords = await hash_passwords_async(passwords)
+            insert = _INSERTS[self.db.get_bind().dialect.name]
+            result = await self.db.execute(
+                insert(models.User)
+                .values([
+                    {"name": user.name, "email": user.email, "level": user.level, "password": password}
+                    for (_, user), password in zip(valid, passwords)
+                ])
+                # a concurrent request inserted the same email after step 2
+                .on_conflict_do_nothing(index_elements=[models.User.email])
+                .returning(models.User.email)
+            )
+            inserted = set(result.scalars())
+            await self.db.commit()
+            self.inserted += len(inserted)
+            rejected += [_row_error(row, "Email already exist.", user.email) for row, user in valid if user.email not in inserted]
+
+        self.failed += len(rejected)
+        rejected.sort(key=lambda line: line["row"])
+        for line in rejected:
+            yield line
@@ -0,0 +1,31 @@
+# app/domain/user/graphql/loaders.py
+# DataLoaders batch every .load(key) made while resolving one "tick" of a query into a
+# single "WHERE ... IN (...)" query, so 100 users → 1 query instead of 100 (the N+1 problem).
+# They are created per request (see app/loaders.py): the cache inside a DataLoader must
+# never be shared between users / requests.
+# db_lock serializes the batches on the shared session (see app/loaders.py).
+import asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from strawberry.dataloader import DataLoader
+from app.domain.user.models import User
+
+
+def users_by_id_loader(db: AsyncSession, db_lock: asyncio.Lock) -> DataLoader[int, User | None]:
+    async def load(ids: list[int]) -> list[User | None]:
+        async with db_lock:
+            users = (await db.execute(select(User).where(User.id.in_(ids)))).scalars().all()
+        by_id = {user.id: user for user in users}
+        return [by_id.get(id) for id in ids]
+
+    return DataLoader(load_fn=load)
+
+
+def users_by_email_loader(db: AsyncSession, db_lock: asyncio.Lock) -> DataLoader[str, User | None]:
+    async def load(emails: list[str]) -> list[User | None]:
+        async with db_lock:
+            users = (await db.execute(select(User).where(User.email.in_(emails)))).scalars().all()
+        by_email = {user.email: user for user in users}
+        return [by_email.get(email) for email in emails]
+
+    return DataLoader(load_fn=load)
@@ -1,15 +1,20 @@
 # app/domain/user/graphql/mutation.py
 import strawberry
+from strawberry.types import Info
 from .types import UserType
-from .. import services  # import business logic layer
+from .. import schema, services  # import business logic layer
 
 
 @strawberry.type
 class UserMutation:
     @strawberry.mutation
-    def create_user(self, name: str, email: str) -> UserType:
+    async def create_user(self, info: Info, name: str, email: str, password: str, level: int = 0) -> UserType:
         # Step 1: call service layer
-        user = services.create_user(name=name, email=email)
+        async with info.context["db_lock"]:
+            user = await services.create_user_async(
+                info.context["db"],
+                schema.createUser(name=name, email=email, password=password, level=level),
+            )
 
         # Step 2: return as GraphQL type
         return UserType(
@@ -1,16 +1,88 @@
 # app/domain/user/graphql/query.py
 import strawberry
-from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from strawberry.types import Info
+from strawberry.types.nodes import SelectedField
+from app.core import pagination
 from app.domain.user.models import User  # SQLAlchemy model
+from app.domain.user import services
+from app.domain.post.graphql.types import PostPage, PostType
 from .types import UserType
-from strawberry.types import Info
+
+MAX_PAGE_SIZE = 100
+
+
+# True if `name` is requested directly under the current field (fragments included)
+def _selects(selections, name: str) -> bool:
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            if selection.name == name:
+                return True
+        elif _selects(selection.selections, name):   # fragment spread / inline fragment
+            return True
+    return False
 
 @strawberry.type
 class UserQuery:
+    # Single lookups go through the request's DataLoaders, so several user(...) fields
+    # in one query (or aliases) are batched into one SQL statement.
+    @strawberry.field
+    async def user(self, info: Info, id: int) -> UserType | None:
+        user = await info.context["loaders"].users_by_id.load(id)
+        return UserType.from_instance(user) if user else None
+
+    # Current user from the Bearer token (resolved once, in the context getter)
+    @strawberry.field
+    def me(self, info: Info) -> UserType | None:
+        current_user = info.context["current_user"]
+        return UserType.from_instance(current_user) if current_user else None
+
+    @strawberry.field
+    async def user_by_email(self, info: Info, email: str) -> UserType | None:
+        user = await info.context["loaders"].users_by_email.load(email)
+        return UserType.from_instance(user) if user else None
+
+    # List with keyset pagination (after = last id seen). Nested `posts` are batched.
+    @strawberry.field
+    async def users(self, info: Info, first: int = 10, after: int | None = None) -> list[UserType]:
+        db: AsyncSession = info.context["db"]
+        stmt = select(User).order_by(User.id).limit(min(first, MAX_PAGE_SIZE))
+        if after is not None:
+            stmt = stmt.where(User.id > after)
+        # users { posts { ... } }: load the page's posts with the users, in one extra
+        # SELECT ... WHERE user_id IN (...), before the resolvers ask for them
+        with_posts = _selects(info.selected_fields[0].selections, "posts")
+        if with_posts:
+            stmt = stmt.options(selectinload(User.post_ref))
+        async with info.context["db_lock"]:
+            users = (await db.execute(stmt)).scalars().all()
+        # prime the loaders so user(id: ...) / post.user / user.posts don't query again
+        loaders = info.context["loaders"]
+        for user in users:
+            loaders.users_by_id.prime(user.id, user)
+            if with_posts:
+                loaders.posts_by_user_id.prime(user.id, sorted(user.post_ref, key=lambda post: post.id))
+        return [UserType.from_instance(user) for user in users]
+
+    # Posts of one user, newest first (same as GET /api/v1/user/{id}/posts)
     @strawberry.field
-    def user(self, info: Info, id: int) -> UserType | None:
-        db: Session = info.context["db"]
-        user = db.query(User).filter(User.id == id).first()
-        if not user:
-            return None
-        return UserType(id=user.id, name=user.name, email=user.email)
+    async def user_posts(self, info: Info, user_id: int, first: int = 10, after: str | None = None) -> PostPage:
+        before_id = None
+        if after is not None:
+            try:
+                before_id = pagination.decode_cursor(after).get("id")
+            except HTTPException:
+                before_id = None
+            if not isinstance(before_id, int):
+                raise ValueError("Invalid cursor.")
+        async with info.context["db_lock"]:
+            posts, has_more = await services.get_posts_by_user_async(
+                info.context["db"], user_id, before_id, min(first, MAX_PAGE_SIZE)
+            )
+        return PostPage(
+            items=[PostType.from_instance(post) for post in posts],
+            next_cursor=pagination.encode_cursor(id=posts[-1].id) if has_more else None,
+        )
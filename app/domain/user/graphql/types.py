@@ -1,5 +1,11 @@
 # app/domain/user/graphql/types.py
+from typing import TYPE_CHECKING, Annotated
 import strawberry
+from strawberry.types import Info
+
+if TYPE_CHECKING:
+    from app.domain.post.graphql.types import PostType
+
 
 # GraphQL types
 @strawberry.type
@@ -8,3 +14,18 @@ class UserType:
     name: str
     email: str
     level: int | None = None
+
+    @classmethod
+    def from_instance(cls, user) -> "UserType":
+        return cls(id=user.id, name=user.name, email=user.email, level=user.level)
+
+    # Nested posts, batched through the per-request posts_by_user_id loader:
+    # a list of N users with their posts costs 2 queries, not N + 1.
+    @strawberry.field
+    async def posts(
+        self, info: Info
+    ) -> list[Annotated["PostType", strawberry.lazy("app.domain.post.graphql.types")]]:
+        from app.domain.post.graphql.types import PostType
+
+        posts = await info.context["loaders"].posts_by_user_id.load(self.id)
+        return [PostType.from_instance(post) for post in posts]
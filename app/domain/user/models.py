@@ -16,4 +16,5 @@ class User(Base):
         # From Post → User (post.owner)
         # From User → list of posts (user.posts)
     # posts is nothing just a simple attribute of User class
-    post_ref = relationship("Post", back_populates="user_ref")
+    # lazy="raise_on_sql": no implicit query per access (N+1), use selectinload(User.post_ref)
+    post_ref = relationship("Post", back_populates="user_ref", lazy="raise_on_sql")
@@ -1,83 +1,143 @@
-from fastapi import APIRouter, Depends, Header, Query,  Response, HTTPException
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import database
+from app.core.database import get_async_db
+from app.core.streaming import EXPORT_FORMATS, export_response
 from app.domain.user import schema, models
 from app.domain.user import services
 from app.core.logging import logger
 from app.domain.user.utils import auth
 from app.core.config import settings
-from typing import List
+from app.core import pagination
 from app.core.limiter import limiter
-from app.core.redis import RedisClient
-import json
+from app.core.cache import cached
+from app.core.serialization import json_response
 
 router = APIRouter(prefix='/v1/user', tags=['V1 Users'])
 
 @router.post('/', response_model=schema.getUser)
-def create_user(user: schema.createUser, db: Session = Depends(get_db)):
-    return services.create_user(db, user)
+async def create_user(user: schema.createUser, db: AsyncSession = Depends(get_async_db)):
+    return await services.create_user_async(db, user)
 
 
 # Here, token and db are not passed manually.
 # Instead, they are resolved automatically by FastAPI’s dependency injection system.
-@router.get("/me")
-def read_users_me(current_user: models.User = Depends(auth.get_current_user)):
+@router.get("/me", response_model=schema.getUser)
+async def read_users_me(current_user: auth.Principal = Depends(auth.get_current_user)):
     return current_user
 
 
+# Export all users as NDJSON or CSV (?format=csv), streamed from a server-side cursor.
+# Declared before '/{id}', which would otherwise match "export".
+# Admins only: the export contains every email address.
+# The generator opens its own session: a get_async_db session is closed by FastAPI before
+# the response body is sent. It holds one connection until the download finishes.
+@router.get('/export')
+async def export_users(
+        fmt: str = Query("ndjson", alias="format", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+        after_id: int | None = Query(None, ge=0),
+        current_user: auth.Principal = Depends(auth.get_admin_user),
+        ):
+    async def batches():
+        async with database.AsyncSessionLocal() as db:
+            async for rows in services.stream_users_async(db, after_id):
+                yield rows
+
+    logger.info("User export (%s) by user %s", fmt, current_user.id)
+    return export_response(batches(), ("id", "name", "email", "level"), fmt, "users")
+
+
 # db is variable has sqlalchemy session object => db: session
 # get_db => has some value which initialized session object
 # Depends(get_db) => tells FastAPI: "Before running this function (get_user), call get_db() and pass its result as the value of db."
 # Depends() is a special helper that tells FastAPI:
 # "This argument is a dependency. Please resolve it before running the function."
+# async def + AsyncSession → the request awaits Postgres instead of holding a threadpool worker.
 @router.get('/{id}', response_model=schema.getUser)
-def get_user(id: int, db: Session = Depends(get_db)):
-    return services.get_user_by_id(db, id)
+@cached("user:{id}", ttl=60, local_ttl=5, model=schema.getUser)
+async def get_user(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await services.get_user_by_id_async(db, id)
+
+# Posts of one user, newest first. Keyset pagination: ?cursor= from the previous response.
+@router.get('/{id}/posts', response_model=schema.UserPosts)
+async def get_user_posts(
+        id: int,
+        cursor: str | None = Query(None),
+        page_size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        db: AsyncSession = Depends(get_async_db),
+        ):
+    before_id = None
+    if cursor is not None:
+        before_id = pagination.decode_cursor(cursor).get("id")
+        if not isinstance(before_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    # 404 for an unknown user is raised by the service (get_user_by_id_async)
+    user, posts, has_more = await services.get_user_posts_async(db, id, before_id, page_size)
+    return json_response(schema.user_posts_adapter, {
+        "user": user,
+        "data": posts,
+        "next_cursor": pagination.encode_cursor(id=posts[-1].id) if has_more else None,
+    })
 
 # Get users list with pagination
-@router.get("/users/", response_model=List[schema.getUser])
-# the limiter just checks Redis synchronously under the hood. so we can keep async
-@limiter.limit("5/minute")   # Limit: 5 requests per minute per IP
-def read_users(
-        db: Session = Depends(get_db),
+# Two modes:
+#   ?page=N        → classic OFFSET pagination with an exact total (cost grows with N and table size)
+#   ?cursor=<...>  → keyset pagination: WHERE id > :last_id, same cost for every page.
+#                    Every response carries next_cursor, so clients can switch after page 1.
+#                    The total is optional (?include_total=true) and is a planner estimate.
+@router.get("/users/", response_model=schema.UserList)
+# the limiter check is awaited (one Redis round trip for all limits), so this stays async
+@limiter.limit("5/minute", key_func=auth.rate_limit_key)   # Limit: 5 requests per minute per user (or IP)
+# Cached in Redis for 60s (+30s stale-while-revalidate), one refill per key across workers,
+# and for 5s in the worker's own memory. Sign-ups / imports bump the "users" version, which
+# retires every cached page at once
+# (model=: the page is cached as serialized JSON bytes, see app/core/serialization.py)
+@cached("users:v{version}:page={page}:size={page_size}:cursor={cursor}:total={include_total}", ttl=60, stale_ttl=30, local_ttl=5, model=schema.UserList, version="users")
+async def read_users(
+        request: Request,   # required by the rate limiter to read the client address
+        db: AsyncSession = Depends(get_async_db),
         page: int = Query(settings.DEFAULT_PAGE, ge=1), # skip: int = 0, 
-        page_size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE) # limit: int = 10, 
+        page_size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE), # limit: int = 10, 
+        cursor: str | None = Query(None),
+        include_total: bool = Query(False),
         ):
 
-    cache_key = f"users:page={page}:size={page_size}"
-    # 1. Try Redis cache
-    cached_data = RedisClient.get(cache_key)
-    if cached_data:
-        return json.loads(cached_data)
-    
-    # 2. Fetch from DB if not cached
-    users, total = services.get_users(db, skip=page, limit=page_size)
-
-    # Generate pagination info
-    total_pages = (total + page_size - 1) // page_size  # ceil division
-    next_page = page + 1 if page < total_pages else None
-    prev_page = page - 1 if page > 1 else None
-
-    # log users
-    logger.info(users)
-
-    result = {
-        "data": [user.dict() for user in users],  # Convert SQLAlchemy → dict
-        "pagination": {
+    if cursor is not None:
+        after_id = pagination.decode_cursor(cursor).get("id")
+        if not isinstance(after_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+        users, has_more = await services.get_users_after_async(db, after_id=after_id, page_size=page_size)
+        total = await pagination.estimate_count(db, models.User) if include_total else None
+        page_info = {
+            "page_size": page_size,
+            "total_users": total,
+            "total_is_estimate": total is not None,
+            "next_cursor": pagination.encode_cursor(id=users[-1].id) if has_more else None,
+        }
+    else:
+        users, total = await services.get_users_async(db, page=page, page_size=page_size)
+
+        # Generate pagination info
+        total_pages = (total + page_size - 1) // page_size  # ceil division
+        next_page = page + 1 if page < total_pages else None
+        prev_page = page - 1 if page > 1 else None
+        page_info = {
             "current_page": page,
             "page_size": page_size,
             "total_users": total,
             "total_pages": total_pages,
             "next_page": next_page,
             "prev_page": prev_page,
-        },
-    }
+            "next_cursor": pagination.encode_cursor(id=users[-1].id) if next_page else None,
+        }
 
-    # 3. Save in Redis with 60s TTL
-    RedisClient.setex(cache_key, 60, json.dumps(result, default=str))
+    # log the page size only: formatting every ORM object cost more than the query
+    logger.debug("Users page: %s rows", len(users))
 
-    return result
+    # ORM objects as is: @cached serializes them straight to JSON bytes with schema.UserList
+    return {"data": users, "pagination": page_info}
 
 
 # form_data: OAuth2PasswordRequestForm = Depends()
@@ -88,15 +148,18 @@ def read_users(
 # Injects it into your function as form_data.
 @router.post('/login')
 # def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-def login(request: schema.login, 
-          response: Response, 
-          db: Session = Depends(get_db),
+async def login(request: schema.login,
+          response: Response,
+          db: AsyncSession = Depends(get_async_db),
           client_type: str = Header(default="web")):
     try:
-        user = services.authenticate_user(db, request)
+        user = await services.authenticate_user_async(db, request)
         if not user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
-        access_token = auth.create_access_token(data={"sub": user.id})
+        # sub must be a string (JWT spec); the extra claims allow AUTH_STATELESS principals
+        access_token = auth.create_access_token(
+            data={"sub": str(user.id), "name": user.name, "email": user.email, "level": user.level}
+        )
         refresh_token = auth.create_refresh_token({"sub": str(user.id)})
 
         if client_type == "web":
@@ -122,8 +185,7 @@ def login(request: schema.login,
         # Reraise known HTTP exceptions (like 401)
         raise http_exc
     except Exception as e:
-        logger.info({str(e)})
-        logger.info("Unexpected error during login")  # Logs full traceback
+        logger.exception("Unexpected error during login")  # Logs full traceback
         raise HTTPException(status_code=500, detail="Internal server error")
 
 ## Refresh Token
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import database
+from app.core.database import get_async_db
+from app.core.streaming import NDJSON_MEDIA_TYPE, DuplexStreamingResponse, ndjson_lines
+from app.domain.user.bulk_import import BulkUserImport
 from app.domain.user import schema
 from app.domain.user import services
+from app.domain.user.utils import auth
 from app.core.logging import logger
 
 router = APIRouter(prefix='/v2/user', tags=['V2 Users'])
 
 # Override: v2 create_user adds "is_active=True" by default
 @router.post('/', response_model=schema.getUser)
-def create_user(user: schema.createUser, db: session = Depends(get_db)):
+async def create_user(user: schema.createUser, db: AsyncSession = Depends(get_async_db)):
 
     # model_dump() does the same thing: returns a dictionary with all field values.
     # It also has more control with options like exclude, include
@@ -22,4 +26,27 @@ def create_user(user: schema.createUser, db: session = Depends(get_db)):
     # Both are same
     # schemas.CreateUser(**{"username": "santosh", "email": "x@y.com", "is_active": True})
     # schemas.CreateUser(username="santosh", email="x@y.com", is_active=True)
-    return services.create_user(db, schema.createUser(**user_data))
+    return await services.create_user_async(db, schema.createUser(**user_data))
+
+
+# Bulk import: body is NDJSON (default) or CSV (Content-Type: text/csv), results stream back
+# as NDJSON while the upload is still being read. See app/domain/user/bulk_import.py.
+#   curl -X POST localhost:8000/api/v2/user/bulk -H 'Content-Type: text/csv' --data-binary @users.csv
+# Admins only: rows choose their own `level`, and ?prehashed=true stores the given hashes.
+# Not a get_async_db dependency: FastAPI closes those before the response body is sent,
+# so the generator opens (and closes) its own session.
+@router.post('/bulk')
+async def bulk_import_users(
+        request: Request,
+        prehashed: bool = False,
+        current_user: auth.Principal = Depends(auth.get_admin_user),
+        ):
+    fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+
+    async def results():
+        async with database.AsyncSessionLocal() as db:
+            async for line in BulkUserImport(db, prehashed=prehashed).run(request.stream(), fmt):
+                yield line
+
+    logger.info("Bulk user import (%s, prehashed=%s) by user %s", fmt, prehashed, current_user.id)
+    return DuplexStreamingResponse(ndjson_lines(results()), media_type=NDJSON_MEDIA_TYPE)
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from typing import List, Optional
+from pydantic import BaseModel, EmailStr, TypeAdapter
+from app.domain.post.schema import GetPost
 
 
 class BaseUser(BaseModel):
@@ -15,6 +17,32 @@ class login(BaseModel):
     
 class getUser(BaseUser):
     id: int
+    # Output model: the email was validated when it was written. Validating it again on every
+    # response (email-validator, tens of µs per address) was most of a user list's CPU time.
+    email: str
 
     class config:
         from_attributes = True
+
+class Pagination(BaseModel):
+    page_size: int
+    current_page: Optional[int] = None
+    total_users: Optional[int] = None
+    total_is_estimate: bool = False
+    total_pages: Optional[int] = None
+    next_page: Optional[int] = None
+    prev_page: Optional[int] = None
+    next_cursor: Optional[str] = None   # pass back as ?cursor= to get the next page
+
+class UserList(BaseModel):
+    data: List[getUser]
+    pagination: Pagination
+
+class UserPosts(BaseModel):
+    user: getUser
+    data: List[GetPost]
+    next_cursor: Optional[str] = None   # pass back as ?cursor= to get older posts
+
+
+# Precompiled serializers for the list responses (app/core/serialization.py)
+user_posts_adapter = TypeAdapter(UserPosts)
@@ -1,11 +1,14 @@
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from app.domain.user import models
 from app.domain.user import schema
-from app.domain.user.utils.auth import hash_password, verify_password
-from app.core.logging import logger
+from app.domain.post import models as post_models
+from app.domain.user.utils.auth import hash_password, verify_password, hash_password_async, verify_password_async
 from typing import List, Tuple
 from app.core.config import settings
+from app.core.cache import response_cache
 
 # User Services
 class UserService:
@@ -19,6 +22,19 @@ class UserService:
     def get_user_by_email(self, email: str):
         return self.db.query(models.User).filter(models.User.email == email).first()
 
+
+# Same as UserService, but on an AsyncSession (queries are awaited, not blocking)
+class AsyncUserService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_user_by_id(self, user_id: int):
+        return await self.db.get(models.User, user_id)
+
+    async def get_user_by_email(self, email: str):
+        result = await self.db.execute(select(models.User).where(models.User.email == email))
+        return result.scalars().first()
+
 # create user
 def create_user(db: Session, user: schema.createUser):
     db_user = db.query(models.User).filter(models.User.email == user.email).first()
@@ -58,13 +74,19 @@ def get_users(
     """
     Args:
         db (Session): SQLAlchemy database session
-        skip (int): Number of records to skip (for pagination)
-        limit (int): Maximum number of records to return
+        page (int): Page number, starting at 1
+        page_size (int): Maximum number of records to return
     Returns:
         List[User]: List of user objects
     """
     total_users = db.query(models.User).count()
-    users = db.query(models.User).offset(page).limit(page_size).all()
+    users = (
+        db.query(models.User)
+        .order_by(models.User.id)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
     
     if not users:
         raise HTTPException(status_code=404, detail="No users found.")
@@ -79,3 +101,140 @@ def authenticate_user(db: Session, request:schema.login):
         return None
 
     return user
+
+
+## Async services (AsyncSession)
+# Same behaviour as the sync functions above, used by the async REST handlers.
+
+async def create_user_async(db: AsyncSession, user: schema.createUser):
+    result = await db.execute(select(models.User.id).where(models.User.email == user.email))
+    if result.first():
+        raise HTTPException(status_code=400, detail="Email already exist.")
+
+    hash_pwd = await hash_password_async(user.password)
+    new_user = models.User(
+        name = user.name,
+        email = user.email,
+        level = user.level,
+        password = hash_pwd
+    )
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+
+    # New row → every cached list page is stale (a brand-new id has no user:{id} entry yet)
+    await response_cache.bump_version("users")
+
+    return new_user
+
+
+async def get_user_by_id_async(db: AsyncSession, user_id: int):
+    db_user = await db.get(models.User, user_id)
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User does not exist.")
+    return db_user
+
+
+async def get_users_async(
+        db: AsyncSession,
+        page: int = settings.DEFAULT_PAGE,
+        page_size: int = settings.DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[models.User], int]:
+    total_users = await db.scalar(select(func.count()).select_from(models.User))
+    result = await db.execute(
+        select(models.User)
+        .order_by(models.User.id)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    users = list(result.scalars().all())
+
+    if not users:
+        raise HTTPException(status_code=404, detail="No users found.")
+
+    return users, total_users
+
+
+# Keyset pagination: WHERE id > :after_id ORDER BY id LIMIT n
+# Uses the primary key index, so a deep page costs the same as page 1 (no OFFSET, no count).
+# Fetches one extra row to know whether there is a next page.
+async def get_users_after_async(
+        db: AsyncSession,
+        after_id: int | None = None,
+        page_size: int = settings.DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[models.User], bool]:
+    stmt = select(models.User).order_by(models.User.id).limit(page_size + 1)
+    if after_id is not None:
+        stmt = stmt.where(models.User.id > after_id)
+    result = await db.execute(stmt)
+    users = list(result.scalars().all())
+
+    if not users and after_id is None:
+        raise HTTPException(status_code=404, detail="No users found.")
+
+    has_more = len(users) > page_size
+    return users[:page_size], has_more
+
+
+# Feed: one user's posts, newest first, keyset on id (before_id = last id of the previous page).
+# WHERE user_id = :id AND id < :before ORDER BY id DESC LIMIT n+1 is a range scan on the
+# (user_id, id DESC) index that stops after n+1 rows, however many posts the user has.
+# Returns (posts, has_more).
+async def get_posts_by_user_async(
+        db: AsyncSession,
+        user_id: int,
+        before_id: int | None = None,
+        page_size: int = settings.DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[post_models.Post], bool]:
+    stmt = (
+        select(post_models.Post)
+        .where(post_models.Post.user_id == user_id)
+        .order_by(post_models.Post.id.desc())
+        .limit(page_size + 1)
+    )
+    if before_id is not None:
+        stmt = stmt.where(post_models.Post.id < before_id)
+    posts = list((await db.execute(stmt)).scalars().all())
+    return posts[:page_size], len(posts) > page_size
+
+
+# Same, plus the user itself (404 if it doesn't exist)
+async def get_user_posts_async(
+        db: AsyncSession,
+        user_id: int,
+        before_id: int | None = None,
+        page_size: int = settings.DEFAULT_PAGE_SIZE
+    ) -> Tuple[models.User, List[post_models.Post], bool]:
+    user = await get_user_by_id_async(db, user_id)
+    posts, has_more = await get_posts_by_user_async(db, user_id, before_id, page_size)
+    return user, posts, has_more
+
+
+# Export: every user (no password column) in id order, in batches of `batch_size` rows.
+# db.stream() + yield_per → server-side cursor: Postgres sends the rows as they are consumed,
+# nothing is materialised as ORM objects and there is no count(*).
+# after_id resumes an interrupted export from the last id received.
+async def stream_users_async(
+        db: AsyncSession,
+        after_id: int | None = None,
+        batch_size: int = settings.EXPORT_BATCH_SIZE
+    ):
+    stmt = (
+        select(models.User.id, models.User.name, models.User.email, models.User.level)
+        .order_by(models.User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if after_id is not None:
+        stmt = stmt.where(models.User.id > after_id)
+    result = await db.stream(stmt)
+    async for rows in result.mappings().partitions():
+        yield rows
+
+
+async def authenticate_user_async(db: AsyncSession, request: schema.login):
+    result = await db.execute(select(models.User).where(models.User.email == request.username))
+    user = result.scalars().first()
+    if not user or not await verify_password_async(request.password, user.password):
+        return None
+
+    return user
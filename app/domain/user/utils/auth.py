@@ -1,32 +1,91 @@
-from passlib.context import CryptContext
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
 from app.core.config import settings
+from app.core.cpu_pool import BoundedProcessPool
+from app.core.cache import LocalCache
+from app.core.limiter import get_remote_address
 from datetime import datetime, timedelta, timezone
-from jose import JWTError, jwt
-from fastapi import Depends, HTTPException
-from sqlalchemy.orm import Session
+from jose import JWTError, jwk, jwt
+from fastapi import Cookie, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.domain.user import models
-
-# Password hassing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.domain.user.utils.hashing import pwd_context, hash_password, hash_passwords, verify_password
 
 # protecting routes
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+# same, but no 401 when the header is missing (routes that also serve anonymous users)
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
+
+# bcrypt costs ~250ms of CPU per call: run it in a process pool, not on the request thread
+hashing_pool = BoundedProcessPool(settings.HASH_POOL_WORKERS, settings.HASH_POOL_MAX_QUEUE)
+
+async def hash_password_async(password: str) -> str:
+    return await hashing_pool.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+# Bulk hashing (imports): small jobs of HASH_POOL_BULK_BATCH passwords, at most
+# HASH_POOL_BULK_WORKERS of them in the pool at once. A job holds a worker for ~1s instead of
+# a whole chunk's share (tens of seconds), and one worker is always left to interactive
+# calls, which would otherwise queue behind the import and get 503s. Results in input order.
+_bulk_hashing = asyncio.Semaphore(settings.HASH_POOL_BULK_WORKERS or max(hashing_pool.max_workers - 1, 1))
+
+async def _hash_batch(passwords: list[str]) -> list[str]:
+    async with _bulk_hashing:
+        return await hashing_pool.run(hash_passwords, passwords)
+
+async def hash_passwords_async(passwords: list[str]) -> list[str]:
+    size = settings.HASH_POOL_BULK_BATCH
+    batches = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    hashed = await asyncio.gather(*(_hash_batch(batch) for batch in batches))
+    return [value for batch in hashed for value in batch]
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# JWT key, prepared once at startup.
+# Passing the raw SECRET_KEY string makes python-jose try json.loads() on it and build a
+# new HMAC key object on every encode/decode; a prebuilt key object skips both.
+jwt_key = jwk.construct(settings.SECRET_KEY, settings.ALGORITHM)
+
+# Verified token → claims. The same token is sent on every request until it expires,
+# so the signature only has to be checked once per token per worker.
+# Entries expire with the token's own `exp`. The returned dict is shared: don't mutate it.
+_verified_tokens = LocalCache(settings.JWT_CACHE_MAXSIZE)
+
+def decode_token(token: str) -> dict:
+    claims = _verified_tokens.get(token)
+    if claims is None:
+        claims = jwt.decode(token, jwt_key, algorithms=[settings.ALGORITHM])  # raises JWTError
+        ttl = claims["exp"] - time.time() if "exp" in claims else 0
+        if ttl > 0:
+            _verified_tokens.set(token, claims, ttl)
+    return claims
+
+
+# Rate limit key: the user id for a valid Bearer token, else the client IP.
+# (Logged-in users behind one NAT/proxy don't share a budget; no DB access, the token is cached.)
+def rate_limit_key(request: Request) -> str:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{decode_token(token)['sub']}"
+        except (JWTError, KeyError):
+            pass
+    return f"ip:{get_remote_address(request)}"
 
 
 # Access Token
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    # jti → unique id per token, used as part of the principal cache key
+    to_encode.update({"exp": expire, "iat": now, "jti": uuid.uuid4().hex})
+    encoded_jwt = jwt.encode(to_encode, jwt_key, algorithm=settings.ALGORITHM)
 
     return encoded_jwt
 
@@ -40,35 +99,91 @@ def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(days=7))
     to_encode.update({"exp": expire, "scope": "refresh_token"})
     encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+        to_encode, jwt_key, algorithm=settings.ALGORITHM
     )
 
     return encoded_jwt
 
 # Verify refresh token
-def verify_refresh_token(token: str, scope: str = "access_token"):
+# Web clients send it back in the HTTP-only cookie set at login, mobile clients as ?token=.
+async def verify_refresh_token(token: str | None = None, refresh_token: str | None = Cookie(default=None)):
+    token = token or refresh_token
     try:
-        payload = jwt.decode(token,settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-        if payload.get("scope") != scope:
+        if token is None:
+            raise JWTError("Missing token")
+        payload = decode_token(token)
+        if payload.get("scope") != "refresh_token":
             raise JWTError("Invalid scope")
         return payload
     except JWTError:
-        return None
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+
+# Authenticated user, as seen by protected routes.
+# A small immutable snapshot instead of the ORM object, so it can be cached across
+# requests (ORM instances belong to the session that loaded them).
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    name: str
+    email: str
+    level: int
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(id=user.id, name=user.name, email=user.email, level=user.level)
+
+
+# Principal cache: "{sub}:{jti}" → Principal, in this worker's memory only, so a token costs
+# one user lookup per AUTH_PRINCIPAL_CACHE_TTL seconds per worker. Its own LRU: principals
+# don't push responses out of the response cache (or count in its stats), and aren't
+# dropped when Redis has a hiccup.
+principal_cache = LocalCache(settings.AUTH_PRINCIPAL_CACHE_SIZE)
+
+def _principal_key(payload: dict) -> str:
+    return f"{payload['sub']}:{payload.get('jti') or payload.get('iat')}"
 
 
 # Get current User
 # Here, token and db are not passed manually.
 # Instead, they are resolved automatically by FastAPI’s dependency injection system.
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# The AsyncSession is lazy: no connection is checked out when the principal comes from the cache.
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Invalid token.")
-    except JWTError:
+        payload = decode_token(token)
+        if payload.get("scope") == "refresh_token":
+            raise JWTError("Refresh token used as access token")
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
         raise HTTPException(status_code=401, detail="Invalid Token")
-    
-    user = db.query(models.User).filter(models.User.email == username).first()
-    if user is None:
-        HTTPException(status_code=401, detail="User not found")
-    return user
+
+    # Stateless mode: trust the signed claims, no DB round-trip at all.
+    # Trade-off: changes to the user are only visible once the token is re-issued.
+    if settings.AUTH_STATELESS and {"name", "email", "level"} <= payload.keys():
+        return Principal(id=user_id, name=payload["name"], email=payload["email"], level=payload["level"])
+
+    key = _principal_key(payload)
+    principal = principal_cache.get(key)
+    if principal is None:
+        user = await db.get(models.User, user_id)
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal = Principal.from_user(user)
+        principal_cache.set(key, principal, settings.AUTH_PRINCIPAL_CACHE_TTL)
+    return principal
+
+
+# Admin-only routes: 401 without a valid token, 403 below ADMIN_LEVEL
+async def get_admin_user(current_user: Principal = Depends(get_current_user)) -> Principal:
+    if current_user.level < settings.ADMIN_LEVEL:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+
+# Optional variant: None for anonymous requests, 401 only for a bad token.
+async def get_optional_user(
+    token: str | None = Depends(oauth2_scheme_optional), db: AsyncSession = Depends(get_async_db)
+) -> Principal | None:
+    if token is None:
+        return None
+    return await get_current_user(token, db)
@@ -0,0 +1,24 @@
+## Password hashing (bcrypt via passlib)
+# Kept in its own small module on purpose: the hashing process pool pickles these
+# functions by reference, so every worker process imports this file, and it should
+# not drag in FastAPI, SQLAlchemy or the settings.
+from passlib.context import CryptContext
+
+# Password hassing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+# Many passwords in one call: one round trip to a pool worker instead of one per password
+def hash_passwords(passwords: list[str]) -> list[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+# True if `value` already is a bcrypt hash (bulk imports from another system)
+def is_password_hash(value: str) -> bool:
+    return pwd_context.identify(value) is not None
@@ -0,0 +1,88 @@
+## Internal (ops) endpoints
+# Not part of the public API: hidden from the OpenAPI docs, meant for dashboards / debugging.
+# Hidden is not protected: every route needs an admin's access token, or the shared
+# INTERNAL_TOKEN as Bearer token (Prometheus `authorization.credentials`, health checks).
+import secrets
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import database
+from app.core.cache import response_cache
+from app.core.capture import traffic_capture
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.limiter import limiter
+from app.core.logging import log_stats
+from app.core.metrics import metrics
+from app.domain.user.utils import auth
+
+
+# Router-wide dependency: 401 without a token, 403 for a non-admin user
+async def require_internal_access(
+    token: str | None = Depends(auth.oauth2_scheme_optional), db: AsyncSession = Depends(get_async_db)
+):
+    if token is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    if settings.INTERNAL_TOKEN and secrets.compare_digest(token.encode(), settings.INTERNAL_TOKEN.encode()):
+        return
+    await auth.get_admin_user(await auth.get_current_user(token, db))
+
+
+router = APIRouter(
+    prefix='/internal',
+    tags=['Internal'],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_access)],
+)
+
+
+# Connection pool statistics for this worker (each uvicorn worker has its own pools)
+@router.get('/db/pool')
+def db_pool_stats():
+    return {
+        "sync": database.sync_pool_stats.snapshot(),
+        "async": database.async_pool_stats.snapshot(),
+    }
+
+
+# Response cache hit/miss counters per tier (local = this worker's memory, redis = shared),
+# and the principal cache of get_current_user
+@router.get('/cache')
+def cache_stats():
+    return {**response_cache.stats(), "principals": auth.principal_cache.stats()}
+
+
+# bcrypt process pool: busy slots and requests rejected with 503
+@router.get('/hashing')
+def hashing_pool_stats():
+    return auth.hashing_pool.stats()
+
+
+# Rate limiter: storage in use, allowed / rejected requests, Redis fallbacks
+@router.get('/ratelimit')
+def rate_limit_stats():
+    return limiter.stats()
+
+
+# Startup warm-up timings of this worker (ms per step, or the error of a failed step)
+@router.get('/warmup')
+def warmup_report(request: Request):
+    return getattr(request.app.state, "warmup", None)
+
+
+# Logging pipeline: records queued, dropped because the queue was full, removed by sampling
+@router.get('/logging')
+def logging_stats():
+    return log_stats()
+
+
+# Traffic capture: requests sampled, written to logs/capture.jsonl, dropped (queue full)
+@router.get('/capture')
+def capture_stats():
+    return traffic_capture.stats()
+
+
+# Request metrics in the Prometheus text format (scrape target for this worker)
+@router.get('/metrics', response_class=PlainTextResponse)
+def request_metrics():
+    return metrics.render()
@@ -0,0 +1,26 @@
+import asyncio
+from dataclasses import dataclass
+from sqlalchemy.ext.asyncio import AsyncSession
+from strawberry.dataloader import DataLoader
+from app.domain.user.graphql.loaders import users_by_id_loader, users_by_email_loader
+from app.domain.post.graphql.loaders import posts_by_user_id_loader
+
+
+# All GraphQL DataLoaders, created fresh for every request (merged like app/schema.py)
+@dataclass
+class Loaders:
+    users_by_id: DataLoader
+    users_by_email: DataLoader
+    posts_by_user_id: DataLoader
+
+
+# One AsyncSession must not run two statements at once, but graphql-core resolves sibling
+# fields concurrently: `{ a: user(id: 1) { id } b: userByEmail(email: "…") { id } }`
+# dispatches both batches in the same tick. Every statement on the request's session
+# (loader batches and resolvers alike) is therefore issued under the request's db_lock.
+def create_loaders(db: AsyncSession, db_lock: asyncio.Lock) -> Loaders:
+    return Loaders(
+        users_by_id=users_by_id_loader(db, db_lock),
+        users_by_email=users_by_email_loader(db, db_lock),
+        posts_by_user_id=posts_by_user_id_loader(db, db_lock),
+    )
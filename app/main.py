@@ -1,9 +1,18 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app import routes
-from app.core.database import Base, engine
-from contextlib import asynccontextmanager
-from slowapi.errors import RateLimitExceeded
-from app.core.limiter import limiter, rate_limit_exceeded_handler
+from app.warmup import warm_up, warm_up_hash_pool
+from app.internal import admin
+from app.core.cache import response_cache
+from app.core.redis import get_redis_client
+from app.domain.user.utils.auth import hashing_pool
+from contextlib import asynccontextmanager, suppress
+from app.core.metrics import MetricsMiddleware
+from app.core.config import settings
+from app.core.query_budget import QueryBudgetMiddleware
+from app.core.capture import CaptureMiddleware, traffic_capture
+from app.core.limiter import RateLimitExceeded, limiter, rate_limit_exceeded_handler
 
 # app = FastAPI(title="FastAPI")
 
@@ -16,21 +25,44 @@ from app.core.limiter import limiter, rate_limit_exceeded_handler
 # When the app shuts down:
 # Everything after yield runs (shutdown logic).
 # Example: close DB connections, cleanup resources, etc.
-# Create tables automatically on startup
 
 
-# @asynccontextmanager
-# async def lifespan(app: FastAPI):
-#     # Startup
-#     Base.metadata.create_all(bind=engine)
-#     yield
-#     # Shutdown (if needed, e.g., close connections)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    # Connections, compiled SQL/GraphQL etc. are ready before the first request
+    app.state.warmup = await warm_up()
+    # bcrypt processes start in the background (only login / sign-up need them)
+    hash_pool_warmup = asyncio.create_task(warm_up_hash_pool())
+    # Each worker listens for cache invalidations published by the others
+    invalidation_listener = asyncio.create_task(response_cache.listen_for_invalidations())
+    # Writer thread of the traffic capture
+    if settings.CAPTURE_ENABLED:
+        traffic_capture.start()
+    yield
+    # Shutdown
+    for task in (invalidation_listener, hash_pool_warmup):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await response_cache.aclose()
+    await get_redis_client().close()
+    hashing_pool.shutdown()
+    traffic_capture.stop()
 
-# # Create app with lifespan handler
-# app = FastAPI(title="FastAPI Blog", lifespan=lifespan)
+# Create app with lifespan handler
+# ORJSONResponse: response bodies are encoded by orjson instead of json.dumps
+# (routes on the hot paths skip even that, see app/core/serialization.py)
+app = FastAPI(title="FastAPI Blog", lifespan=lifespan, default_response_class=ORJSONResponse)
 
-
-app = FastAPI(title="FastAPI Blog")
+# Latency / status / DB / Redis metrics per request (/internal/metrics, Server-Timing header)
+app.add_middleware(MetricsMiddleware)
+# Logs the repeated / slow statements of requests over the query budget (opt-in)
+if settings.QUERY_BUDGET_ENABLED:
+    app.add_middleware(QueryBudgetMiddleware)
+# Samples requests (anonymized) into logs/capture.jsonl for benchmarks/replay.py (opt-in)
+if settings.CAPTURE_ENABLED:
+    app.add_middleware(CaptureMiddleware)
 
 # Attach limiter to app
 app.state.limiter = limiter
@@ -40,6 +72,7 @@ app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 # All Routers
 app.include_router(routes.restapi_routes, prefix="/api")
 app.include_router(routes.graphql_route, prefix="/graphql")
+app.include_router(admin.router)
 
 # Root Router
 @app.get('/', tags=['Root'])
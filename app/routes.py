@@ -1,8 +1,13 @@
 ## Restapi Routes
-from fastapi import APIRouter
+import asyncio
+import time
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.domain.user.restapi import routers as user_routers
 from app.domain.post import routers as post_routers
-from app.core.database import get_db
+from app.domain.user.utils import auth
+from app.core.database import get_async_db
+from app.loaders import create_loaders
 
 ## Graphql Routes
 from strawberry.fastapi import GraphQLRouter
@@ -18,15 +23,25 @@ restapi_routes.include_router(post_routers.router)
 
 # Mount GraphQL Routes
 
-# GraphQL context
-def get_context():
-    db = next(get_db())   # create DB session
-    return {"db": db}
-
-# GraphQL context
-def get_context():
-    db = next(get_db())   # create DB session
-    return {"db": db}
+# GraphQL context (one per request)
+# The context getter is a normal FastAPI dependency, so the AsyncSession comes from the
+# get_async_db yield-dependency: it is checked out of the pool for this request only and
+# closed by FastAPI once the request is done. (The old next(get_db()) never ran the
+# generator's `finally: db.close()`, leaking one connection per request until GC.)
+# get_optional_user shares the same session (FastAPI caches dependencies per request).
+# Resolvers run concurrently, so every statement on `db` goes through `db_lock`.
+async def get_context(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: auth.Principal | None = Depends(auth.get_optional_user),
+):
+    db_lock = asyncio.Lock()
+    return {
+        "db": db,
+        "db_lock": db_lock,
+        "loaders": create_loaders(db, db_lock),
+        "current_user": current_user,
+        "timing": {"started_at": time.perf_counter()},
+    }
 
 # User GraphQL router
 graphql_route = GraphQLRouter(
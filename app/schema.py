@@ -1,6 +1,7 @@
 import strawberry
 from app.domain.user.graphql.query import UserQuery
 from app.domain.user.graphql.mutation import UserMutation
+from app.core.graphql_extensions import PersistedQueries, DocumentCache, QueryCost, ResolverTimings
 
 @strawberry.type
 class Query(UserQuery):   # merge queries
@@ -10,4 +11,10 @@ class Query(UserQuery):   # merge queries
 class Mutation(UserMutation):  # merge mutations
     pass
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+# Extensions run in order: resolve persisted query → cached parse/validate → cost/depth limits
+# → resolver timings (/internal/metrics)
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    extensions=[PersistedQueries, DocumentCache, QueryCost, ResolverTimings],
+)
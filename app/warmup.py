@@ -0,0 +1,121 @@
+## Startup warm-up (called from the lifespan in app/main.py)
+# Without it the first requests of every new worker pay for: opening DB connections,
+# connecting to Redis, SQLAlchemy mapper configuration + SQL compilation of each statement,
+# graphql-core's first execution, and spawning the bcrypt processes.
+# Here that happens before uvicorn accepts traffic, so a new pod is ready and fast at once.
+#
+# Every step is timed and a failing step is logged and skipped: Redis or Postgres being
+# unreachable must not stop the app from starting (requests will retry / fall back).
+# The whole warm-up has a deadline (WARMUP_TIMEOUT): an unreachable host would otherwise hold
+# startup for its connect / pool timeouts (30s+). A step still running at the deadline is
+# cancelled and reported as timed out; steps after it are skipped.
+
+import asyncio
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from app.core import database
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.redis import get_redis_client
+from app.domain.post import services as post_services
+from app.domain.user import services as user_services
+from app.domain.user.utils import auth
+from app.domain.user.utils.hashing import hash_passwords
+from app.schema import schema
+
+# ids/emails that match nothing: only the SQL compilation (cached per engine) matters
+_NO_ID = 0
+_NO_EMAIL = ""
+
+
+async def _open_db_connections():
+    if settings.WARMUP_DB_CONNECTIONS <= 0:
+        return
+    # hold them all at once, otherwise the pool would hand out the same connection N times
+    connections = [database.async_engine.connect() for _ in range(settings.WARMUP_DB_CONNECTIONS)]
+    try:
+        opened = await asyncio.gather(*(connection.start() for connection in connections))
+        await asyncio.gather(*(connection.execute(text("SELECT 1")) for connection in opened))
+    finally:
+        await asyncio.gather(*(connection.close() for connection in connections), return_exceptions=True)
+
+
+async def _connect_redis():
+    client = await get_redis_client().get_client()
+    await client.ping()
+
+
+# Hot statements of the REST/GraphQL handlers, run once so the compiled SQL is cached
+async def _compile_hot_sql():
+    configure_mappers()
+    async with database.AsyncSessionLocal() as db:
+        await user_services.AsyncUserService(db).get_user_by_id(_NO_ID)
+        await user_services.AsyncUserService(db).get_user_by_email(_NO_EMAIL)
+        await user_services.get_users_after_async(db, after_id=_NO_ID)
+        await user_services.get_posts_by_user_async(db, _NO_ID)
+        await post_services.get_post_async(db, _NO_ID)
+        await post_services.get_posts_async(db, [_NO_ID])
+
+
+async def _prepare_graphql():
+    result = await schema.execute("query Warmup { __typename }")
+    if result.errors:
+        raise result.errors[0]
+
+
+def _prepare_jwt():
+    auth.decode_token(auth.create_access_token({"sub": str(_NO_ID)}))
+
+
+async def _step(name: str, fn, report: dict, deadline: float):
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        report[name] = "skipped: warm-up deadline reached"
+        logger.warning("Warm-up step %s skipped: deadline reached", name)
+        return
+    start = time.perf_counter()
+    try:
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await asyncio.wait_for(result, remaining)
+        report[name] = round((time.perf_counter() - start) * 1000, 1)
+    except asyncio.TimeoutError:
+        report[name] = f"timed out after {remaining:.1f}s"
+        logger.warning("Warm-up step %s timed out after %.1fs", name, remaining)
+    except Exception as exc:
+        report[name] = f"failed: {exc}"
+        logger.warning("Warm-up step %s failed: %s", name, exc)
+
+
+# Returns {step: milliseconds, "failed: ...", "timed out ..." or "skipped: ..."}
+async def warm_up() -> dict:
+    report: dict = {}
+    start = time.perf_counter()
+    deadline = time.monotonic() + settings.WARMUP_TIMEOUT
+    # independent network round trips run concurrently
+    await asyncio.gather(
+        _step("db_connections", _open_db_connections, report, deadline),
+        _step("redis", _connect_redis, report, deadline),
+    )
+    await _step("sql", _compile_hot_sql, report, deadline)
+    await _step("graphql", _prepare_graphql, report, deadline)
+    await _step("jwt", _prepare_jwt, report, deadline)
+    report["total"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("Warm-up done: %s", report)
+    return report
+
+
+# Not awaited by the lifespan: the app can serve (non-hashing) requests while it runs
+async def warm_up_hash_pool():
+    if not settings.WARMUP_HASH_POOL:
+        return
+    start = time.perf_counter()
+    try:
+        await auth.hashing_pool.warm_up(hash_passwords, [])
+    except Exception as exc:
+        logger.warning("Hash pool warm-up failed: %s", exc)
+        return
+    logger.info("Hash pool warm: %s workers in %.0f ms", auth.hashing_pool.max_workers, (time.perf_counter() - start) * 1000)
@@ -0,0 +1,83 @@
+## Import-time profile: what a new worker spends before it can serve a request
+# Run from the project root:  python -m benchmarks.importtime [--module app.main] [--top 20] [--json]
+#
+# Runs `python -X importtime -c "import <module>"` in a fresh interpreter (nothing cached
+# in sys.modules) and summarises the raw report:
+#   packages → cumulative time per top-level package (fastapi, strawberry, sqlalchemy, ...)
+#   modules  → the slowest single modules by self time (their own code, children excluded)
+# Numbers are from one cold run: compare before/after on the same machine, several runs.
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)$")
+
+
+def profile(module: str) -> list[dict]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(proc.stderr)
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            rows.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+    return rows
+
+
+def summarise(rows: list[dict], module: str, top: int) -> dict:
+    total = next((row["cumulative_ms"] for row in rows if row["module"] == module), 0.0)
+    # A package's time is charged to whichever import of it ran first; later imports are free
+    packages: dict[str, float] = {}
+    for row in rows:
+        if "." not in row["module"]:
+            packages[row["module"]] = packages.get(row["module"], 0.0) + row["cumulative_ms"]
+    return {
+        "module": module,
+        "total_ms": round(total, 1),
+        "modules_imported": len(rows),
+        "packages": [
+            {"package": name, "cumulative_ms": round(ms, 1), "share": round(ms / total, 3) if total else 0.0}
+            for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        ],
+        "modules": [
+            {"module": row["module"], "self_ms": round(row["self_ms"], 1)}
+            for row in sorted(rows, key=lambda row: -row["self_ms"])[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise `python -X importtime` for a module.")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    report = summarise(profile(args.module), args.module, args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"import {report['module']}: {report['total_ms']:.1f} ms, {report['modules_imported']} modules\n")
+    print(f"{'package':<32} {'cumulative ms':>14} {'share':>7}")
+    for row in report["packages"]:
+        print(f"{row['package']:<32} {row['cumulative_ms']:>14.1f} {row['share']:>7.1%}")
+    print(f"\n{'module':<48} {'self ms':>8}")
+    for row in report["modules"]:
+        print(f"{row['module']:<48} {row['self_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+## Load test: replay a workload against the app and report latency per endpoint
+# Run from the project root:
+#   python -m benchmarks.loadtest                                  # SQLite + fakeredis, in process
+#   python -m benchmarks.loadtest --requests 5000 --concurrency 50 --output after.json
+#   python -m benchmarks.loadtest --baseline before.json --max-regression 10
+#   python -m benchmarks.loadtest --database-url postgresql+asyncpg://user:pw@localhost/bench
+#   python -m benchmarks.loadtest --base-url http://staging:8000 --no-seed
+#
+# In process (default), the app is served through httpx's ASGI transport: no sockets, no
+# uvicorn, so the numbers are the app's own cost (routing, validation, SQL, cache, JSON).
+#   - database: a fresh SQLite file (default) or --database-url (use a scratch database:
+#     tables are created if missing and N users / posts are added on every run)
+#   - Redis: fakeredis (in memory), unless --redis-url
+#   - the app's lifespan runs (warm-up, cache invalidation listener), rate limits are off
+#     unless --rate-limit
+# With --base-url the requests go over HTTP to a running server instead (nothing is booted;
+# --no-seed uses the ids already there: pass --user-ids / --post-ids ranges).
+#
+# Workload: JSON lines, one request per line (default: benchmarks/workload.jsonl)
+#   {"method": "GET", "path": "/api/v1/user/{user_id}"}
+#   {"method": "GET", "path": "/api/post", "query": {"ids": "{post_ids}"}, "weight": 3}
+#   {"method": "POST", "path": "/api/post/", "body": {"title": "{uuid}", ...}}
+#   {"method": "GET", "path": "/api/v1/user/me", "auth": true, "name": "me"}
+# Placeholders in path / query / body strings: {user_id} {post_id} (a random seeded id),
+# {post_ids} (10 of them, comma separated), {uuid}, {n} (random int). A string that is only
+# "{user_id}" / "{post_id}" / "{n}" becomes a number.
+# `weight` repeats the line, `auth` sends a Bearer token of a seeded user, `name` labels the
+# endpoint in the report (default: "METHOD path-template").
+# Queries using Postgres-only SQL (/api/post/search) fail on SQLite.
+#
+# Report (stdout or --output): per endpoint count, errors, status codes, throughput and
+# p50/p95/p99/max latency in ms, plus the same over all requests. Errors are transport
+# failures, 5xx and GraphQL responses carrying `errors` (counted as status "graphql_error"). With --baseline, each
+# endpoint also gets the change vs the baseline report (in %), and --max-regression makes
+# the run exit with status 1 when any p95 got worse by more than that many percent.
+# Compare runs on the same machine; look at p95/p99 over several runs, not one.
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+import httpx
+
+DEFAULT_WORKLOAD = Path(__file__).with_name("workload.jsonl")
+PERCENTILES = (50, 95, 99)
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+_NUMERIC = {"user_id", "post_id", "n"}
+
+
+## Workload
+def load_workload(path: Path) -> list[dict]:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                sys.exit(f"{path}:{number}: invalid JSON ({exc})")
+            if "method" not in record or "path" not in record:
+                sys.exit(f"{path}:{number}: 'method' and 'path' are required")
+            record["method"] = record["method"].upper()
+            record.setdefault("name", f"{record['method']} {record['path']}")
+            records.extend([record] * int(record.get("weight", 1)))
+    if not records:
+        sys.exit(f"{path}: no requests")
+    return records
+
+
+class Fixtures:
+    def __init__(self, user_ids: list[int], post_ids: list[int], tokens: list[str] | None = None):
+        self.user_ids = user_ids or [1]
+        self.post_ids = post_ids or [1]
+        self.tokens = tokens or []
+
+    def value(self, name: str):
+        if name == "user_id":
+            return random.choice(self.user_ids)
+        if name == "post_id":
+            return random.choice(self.post_ids)
+        if name == "post_ids":
+            return ",".join(str(id) for id in random.sample(self.post_ids, min(10, len(self.post_ids))))
+        if name == "uuid":
+            return uuid.uuid4().hex
+        if name == "n":
+            return random.randint(1, 1_000_000)
+        return "{" + name + "}"   # not ours, left as is
+
+    def fill(self, value):
+        if isinstance(value, str):
+            whole = _PLACEHOLDER.fullmatch(value)
+            if whole and whole.group(1) in _NUMERIC:
+                return self.value(whole.group(1))
+            return _PLACEHOLDER.sub(lambda match: str(self.value(match.group(1))), value)
+        if isinstance(value, dict):
+            return {key: self.fill(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.fill(item) for item in value]
+        return value
+
+    def build(self, record: dict) -> dict:
+        headers = dict(record.get("headers") or {})
+        if record.get("auth") and self.tokens:
+            headers["Authorization"] = f"Bearer {random.choice(self.tokens)}"
+        query = record.get("query") or None
+        return {
+            "method": record["method"],
+            "url": self.fill(record["path"]),
+            "params": self.fill(query) if isinstance(query, dict) else query,
+            "json": self.fill(record["body"]) if record.get("body") is not None else None,
+            "headers": headers,
+        }
+
+
+## In-process environment: point the app at the benchmark database / Redis before it serves
+def _sqlite_compat(engine):
+    # The posts.search_vector generated column uses Postgres text search; on SQLite it is
+    # stored as plain text through passthrough functions (search itself stays Postgres-only).
+    from sqlalchemy import event
+    from sqlalchemy.dialects.postgresql import TSVECTOR
+    from sqlalchemy.ext.compiler import compiles
+
+    compiles(TSVECTOR, "sqlite")(lambda type_, compiler, **kw: "TEXT")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _functions(dbapi_connection, connection_record):
+        dbapi_connection.create_function("to_tsvector", 2, lambda config, text: text, deterministic=True)
+        dbapi_connection.create_function("setweight", 2, lambda vector, weight: vector, deterministic=True)
+
+
+async def boot(database_url: str, redis_url: str | None):
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from app.core import database
+    from app.core.config import settings
+    from app.core.metrics import instrument_engine
+    from app.core.redis import get_redis_client
+
+    engine = create_async_engine(database_url)
+    if engine.dialect.name == "sqlite":
+        _sqlite_compat(engine)
+    instrument_engine(engine.sync_engine)
+    if settings.QUERY_BUDGET_ENABLED:
+        from app.core import query_budget
+        query_budget.install(engine.sync_engine)
+    database.async_engine = engine
+    database.AsyncSessionLocal = async_sessionmaker(
+        bind=engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+    )
+
+    redis_client = get_redis_client()
+    if redis_url:
+        redis_client._url = redis_url
+    else:
+        import fakeredis
+        from redis.exceptions import ResponseError
+
+        redis_client._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        # The cache locks and the rate limiter are Lua scripts. Without lupa every EVAL fails,
+        # the response cache switches itself off for seconds at a time, and the run would
+        # measure a degraded cache.
+        try:
+            await redis_client._client.eval("return 1", 0)
+        except ResponseError as exc:
+            sys.exit(f"fakeredis cannot run Lua scripts ({exc}): pip install lupa")
+
+    # register the tables on Base.metadata (imported for that side effect only)
+    for module in ("app.domain.post.models", "app.domain.user.models"):
+        importlib.import_module(module)
+    async with engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+    return engine
+
+
+async def seed(users: int, posts_per_user: int) -> tuple[list[int], list[int], list[str]]:
+    from sqlalchemy import insert
+
+    from app.core import database
+    from app.domain.post.models import Post
+    from app.domain.user.models import User
+    from app.domain.user.utils import auth
+    from app.domain.user.utils.hashing import hash_password
+
+    password = hash_password("loadtest")   # one hash for everybody, bcrypt is slow on purpose
+    run = uuid.uuid4().hex[:8]           # unique emails: seeding twice into one database works
+    user_ids, post_ids = [], []
+    async with database.AsyncSessionLocal() as db:
+        for start in range(0, users, 1000):
+            rows = [
+                {"name": f"User {i}", "email": f"loadtest-{run}-{i}@example.com", "password": password, "level": 0}
+                for i in range(start, min(start + 1000, users))
+            ]
+            user_ids += (await db.scalars(insert(User).returning(User.id), rows)).all()
+        rows = [
+            {"title": f"Post {run}-{user_id}-{i}", "content": f"Load test post {i} by user {user_id}", "user_id": user_id}
+            for user_id in user_ids
+            for i in range(posts_per_user)
+        ]
+        for start in range(0, len(rows), 1000):
+            post_ids += (await db.scalars(insert(Post).returning(Post.id), rows[start:start + 1000])).all()
+        await db.commit()
+    tokens = [
+        auth.create_access_token({"sub": str(user_id)})
+        for user_id in user_ids[:100]
+    ]
+    return user_ids, post_ids, tokens
+
+
+## Load
+# The status a sample is counted under: the HTTP status, or "graphql_error" for a GraphQL
+# response with `errors` (GraphQL reports failures with HTTP 200)
+async def response_status(response: httpx.Response) -> int | str:
+    await response.aread()
+    if response.status_code == 200 and response.url.path.rstrip("/").endswith("/graphql"):
+        try:
+            if response.json().get("errors"):
+                return "graphql_error"
+        except (ValueError, AttributeError):
+            pass
+    return response.status_code
+
+
+def is_error(status: int | str | None) -> bool:
+    return status is None or status == "graphql_error" or status >= 500
+
+
+async def run_load(client: httpx.AsyncClient, workload: list[dict], fixtures: Fixtures,
+                   total: int, concurrency: int, duration: float | None) -> tuple[dict, float]:
+    samples: dict[str, list] = {}   # endpoint → [(ms, HTTP status, "graphql_error" or None)]
+    sent = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal sent
+        while (sent < total) if deadline is None else (time.perf_counter() < deadline):
+            sent += 1
+            record = random.choice(workload)
+            request = fixtures.build(record)
+            start = time.perf_counter()
+            try:
+                status = await response_status(await client.request(**request))
+            except httpx.HTTPError:
+                status = None
+            samples.setdefault(record["name"], []).append(((time.perf_counter() - start) * 1000, status))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+## Report
+def percentile(ordered: list[float], p: float) -> float:
+    # nearest rank: the value below which p% of the samples fall
+    return ordered[max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))]
+
+
+def summarise(samples: list, elapsed: float) -> dict:
+    ordered = sorted(ms for ms, _ in samples)
+    statuses: dict[str, int] = {}
+    for _, status in samples:
+        key = str(status) if status is not None else "error"
+        statuses[key] = statuses.get(key, 0) + 1
+    summary = {
+        "count": len(samples),
+        "errors": sum(1 for _, status in samples if is_error(status)),
+        "statuses": dict(sorted(statuses.items())),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(percentile(ordered, p), 3)
+    summary["max_ms"] = round(ordered[-1], 3)
+    return summary
+
+
+def build_report(samples: dict, elapsed: float, config: dict) -> dict:
+    return {
+        "config": config,
+        "elapsed_s": round(elapsed, 3),
+        "total": summarise([sample for endpoint in samples.values() for sample in endpoint], elapsed),
+        "endpoints": {name: summarise(samples[name], elapsed) for name in sorted(samples)},
+    }
+
+
+_COMPARED = ["rps", "mean_ms", *(f"p{p}_ms" for p in PERCENTILES)]
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    def change(current: dict, before: dict | None) -> dict | None:
+        if before is None:
+            return None
+        return {
+            key: round((current[key] - before[key]) / before[key] * 100, 1) if before.get(key) else None
+            for key in _COMPARED
+        }
+
+    return {
+        "total": change(report["total"], baseline.get("total")),
+        "endpoints": {
+            name: change(summary, baseline.get("endpoints", {}).get(name))
+            for name, summary in report["endpoints"].items()
+        },
+    }
+
+
+def regressions(comparison: dict, max_regression: float) -> list[str]:
+    changes = {"total": comparison["total"], **comparison["endpoints"]}
+    return [
+        f"{name}: p95 {change['p95_ms']:+.1f}%"
+        for name, change in changes.items()
+        if change and change["p95_ms"] is not None and change["p95_ms"] > max_regression
+    ]
+
+
+def _ids(value: str | None) -> list[int]:
+    # "1-500" or "1,2,3"
+    if not value:
+        return []
+    if "-" in value:
+        low, high = value.split("-", 1)
+        return list(range(int(low), int(high) + 1))
+    return [int(id) for id in value.split(",")]
+
+
+async def main_async(args) -> dict:
+    workload = load_workload(args.workload)
+    config = {
+        "workload": str(args.workload),
+        "requests": args.requests if not args.duration else None,
+        "duration_s": args.duration,
+        "concurrency": args.concurrency,
+        "target": args.base_url or "asgi",
+    }
+    async with AsyncExitStack() as stack:
+        if args.base_url:
+            client = await stack.enter_async_context(httpx.AsyncClient(base_url=args.base_url, timeout=30))
+            fixtures = Fixtures(_ids(args.user_ids), _ids(args.post_ids))
+        else:
+            from app.core.config import settings
+
+            settings.RATE_LIMIT_ENABLED = args.rate_limit
+            database_url = args.database_url
+            if database_url is None:
+                tmp = stack.enter_context(tempfile.TemporaryDirectory())
+                database_url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'loadtest.db')}"
+            engine = await boot(database_url, args.redis_url)
+            stack.push_async_callback(engine.dispose)
+            config.update(database=engine.dialect.name, redis=args.redis_url or "fakeredis",
+                          users=args.users, posts_per_user=args.posts_per_user)
+
+            from app.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            user_ids, post_ids, tokens = ([], [], []) if args.no_seed else await seed(args.users, args.posts_per_user)
+            fixtures = Fixtures(user_ids or _ids(args.user_ids), post_ids or _ids(args.post_ids), tokens)
+            transport = httpx.ASGITransport(app=app)
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30)
+            )
+
+        if args.warmup:
+            await run_load(client, workload, fixtures, args.warmup, args.concurrency, None)
+        samples, elapsed = await run_load(client, workload, fixtures, args.requests, args.concurrency, args.duration)
+    return build_report(samples, elapsed, config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a JSON-lines workload and report latency per endpoint.")
+    parser.add_argument("--workload", type=Path, default=DEFAULT_WORKLOAD)
+    parser.add_argument("--requests", type=int, default=2000, help="requests to send (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="send requests for this many seconds instead")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=200, help="requests sent before measuring")
+    parser.add_argument("--users", type=int, default=1000, help="users to seed")
+    parser.add_argument("--posts-per-user", type=int, default=5)
+    parser.add_argument("--no-seed", action="store_true", help="use existing rows (--user-ids / --post-ids)")
+    parser.add_argument("--user-ids", help='ids for {user_id}, e.g. "1-500"')
+    parser.add_argument("--post-ids", help='ids for {post_id}, e.g. "1-5000"')
+    parser.add_argument("--database-url", help="async SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--redis-url", help="real Redis instead of fakeredis")
+    parser.add_argument("--base-url", help="load a running server over HTTP instead of the in-process app")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the rate limits on")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (same request sequence per run)")
+    parser.add_argument("--output", type=Path, help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", type=Path, help="JSON report of an earlier run to compare with")
+    parser.add_argument("--max-regression", type=float, help="exit 1 when a p95 is this many %% worse than the baseline")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # one INFO line per request from the client would go through the app's log queue too
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    finish(asyncio.run(main_async(args)), args)
+
+
+# Baseline comparison, then the report to --output or stdout (shared with benchmarks/replay.py)
+def finish(report: dict, args):
+    failed = []
+    if args.baseline:
+        report["comparison"] = compare(report, json.loads(args.baseline.read_text()))
+        if args.max_regression is not None:
+            failed = regressions(report["comparison"], args.max_regression)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+    if failed:
+        sys.exit("p95 regressions over {}%:\n  {}".format(args.max_regression, "\n  ".join(failed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+## Replay captured traffic (logs/capture.jsonl, see app/core/capture.py) against a server
+# Run from the project root:
+#   python -m benchmarks.replay logs/capture.jsonl* --base-url http://staging:8000
+#   python -m benchmarks.replay logs/capture.jsonl --speed 5          # 5x faster than captured
+#   python -m benchmarks.replay logs/capture.jsonl --rate 200         # fixed 200 requests/s
+#   python -m benchmarks.replay logs/capture.jsonl --speed 0 --concurrency 50   # as fast as possible
+#   python -m benchmarks.replay logs/capture.jsonl --token "$JWT" --output replay.json
+#
+# Requests are sent in capture order. With --speed (default 1) each one leaves at its
+# original offset from the first request divided by the speed, so bursts and quiet periods
+# of production are kept; --rate spaces them evenly instead. At most --concurrency requests
+# are in flight: when the server can't keep up they leave late, and the report says how late
+# (lag_ms) rather than silently lowering the load.
+#
+# The capture is anonymized, so requests are rebuilt:
+#   query values "<str:N>" → N random letters; numbers / booleans as captured
+#   JSON bodies → generated from body_shape (strings "replay-…", emails "replay-…@example.com",
+#                 ints between 1 and --max-int, so ids mostly point at existing rows)
+#   auth → Authorization: Bearer --token (without --token such requests go anonymous)
+# Non-JSON bodies (CSV uploads) can't be rebuilt and are skipped (counted in the report).
+#
+# Report: same JSON as benchmarks/loadtest.py, per "METHOD route", plus the latency the
+# same requests had when captured (captured_p50_ms / captured_p95_ms). --baseline compares
+# with an earlier replay report.
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import string
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+from benchmarks.loadtest import PERCENTILES, build_report, finish, percentile, response_status
+
+
+def load_capture(paths: list[Path], limit: int | None = None) -> list[dict]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda record: record["ts"])   # rotated files: .1 is older than the current one
+    return records[:limit] if limit else records
+
+
+def _query_value(value: str) -> str:
+    if value.startswith("<str:") and value.endswith(">"):
+        return "".join(random.choices(string.ascii_lowercase, k=int(value[5:-1])))
+    return value
+
+
+def body_from_shape(shape, max_int: int, key: str = ""):
+    if isinstance(shape, dict):
+        if "list" in shape and "item" in shape:
+            return [body_from_shape(shape["item"], max_int, key) for _ in range(shape["list"])]
+        return {name: body_from_shape(item, max_int, name) for name, item in shape.items()}
+    if shape == "int":
+        return random.randint(1, max_int)
+    if shape == "float":
+        return random.random()
+    if shape == "bool":
+        return random.random() < 0.5
+    if shape == "str":
+        return f"replay-{uuid.uuid4().hex[:12]}" + ("@example.com" if "email" in key.lower() else "")
+    return None
+
+
+def build_request(record: dict, token: str | None, max_int: int) -> dict | None:
+    body = None
+    if record.get("body_bytes"):
+        if record.get("body_shape") is None:
+            return None
+        body = body_from_shape(record["body_shape"], max_int)
+    headers = {}
+    if record.get("auth") and token:
+        headers["Authorization"] = f"Bearer {token}"
+    return {
+        "method": record["method"],
+        "url": record["path"],
+        "params": {key: _query_value(value) for key, value in (record.get("query") or {}).items()},
+        "json": body,
+        "headers": headers,
+    }
+
+
+async def replay(client: httpx.AsyncClient, records: list[dict], speed: float = 1.0,
+                 rate: float | None = None, concurrency: int = 100, token: str | None = None,
+                 max_int: int = 100) -> tuple[dict, dict, int, float]:
+    samples: dict[str, list] = {}       # endpoint → [(ms, HTTP status, "graphql_error" or None)]
+    details: dict[str, dict] = {}       # endpoint → captured latencies, lag
+    slots = asyncio.Semaphore(concurrency)
+    skipped = 0
+
+    async def send(name: str, request: dict, due: float):
+        async with slots:
+            lag_ms = max(0.0, (time.perf_counter() - due) * 1000)
+            start = time.perf_counter()
+            try:
+                status = await response_status(await client.request(**request))
+            except httpx.HTTPError:
+                status = None
+            samples.setdefault(name, []).append(((time.perf_counter() - start) * 1000, status))
+            details[name]["lag_ms"].append(lag_ms)
+
+    tasks = []
+    first_ts = records[0]["ts"] if records else 0.0
+    start = time.perf_counter()
+    for index, record in enumerate(records):
+        request = build_request(record, token, max_int)
+        if request is None:
+            skipped += 1
+            continue
+        if rate:
+            due = start + index / rate
+        elif speed > 0:
+            due = start + (record["ts"] - first_ts) / speed
+        else:
+            due = time.perf_counter()
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name = f"{record['method']} {record.get('route') or record['path']}"
+        details.setdefault(name, {"captured_ms": [], "lag_ms": []})["captured_ms"].append(record["latency_ms"])
+        tasks.append(asyncio.create_task(send(name, request, due)))
+    await asyncio.gather(*tasks)
+    return samples, details, skipped, time.perf_counter() - start
+
+
+def add_details(report: dict, details: dict, skipped: int) -> dict:
+    report["skipped"] = skipped
+    for name, summary in report["endpoints"].items():
+        captured = sorted(details[name]["captured_ms"])
+        lag = sorted(details[name]["lag_ms"])
+        for p in PERCENTILES[:2]:
+            summary[f"captured_p{p}_ms"] = round(percentile(captured, p), 3)
+        summary["lag_p95_ms"] = round(percentile(lag, 95), 3)
+    return report
+
+
+async def main_async(args) -> dict:
+    records = load_capture(args.files, args.limit)
+    if not records:
+        sys.exit("no captured requests")
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        samples, details, skipped, elapsed = await replay(
+            client, records, args.speed, args.rate, args.concurrency, args.token, args.max_int
+        )
+    if not samples:
+        sys.exit(f"nothing to replay: {skipped} requests had bodies that can't be rebuilt")
+    config = {
+        "files": [str(path) for path in args.files],
+        "requests": len(records),
+        "speed": args.speed if not args.rate else None,
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        "target": args.base_url,
+        "captured_span_s": round(records[-1]["ts"] - records[0]["ts"], 3),
+    }
+    return add_details(build_report(samples, elapsed, config), details, skipped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a traffic capture against a running server.")
+    parser.add_argument("files", nargs="+", type=Path, help="capture files (logs/capture.jsonl, rotated .1 .2 ...)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale: 2 = twice as fast, 0 = no pauses")
+    parser.add_argument("--rate", type=float, help="fixed requests per second instead of the captured timing")
+    parser.add_argument("--concurrency", type=int, default=100, help="max requests in flight")
+    parser.add_argument("--limit", type=int, help="replay the first N requests only")
+    parser.add_argument("--token", help="JWT sent on requests that were authenticated")
+    parser.add_argument("--max-int", type=int, default=100, help="upper bound for generated ints (ids) in bodies")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path, help="earlier replay report to compare with")
+    parser.add_argument("--max-regression", type=float, help="exit 1 when a p95 is this many %% worse than the baseline")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    finish(asyncio.run(main_async(args)), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+## Micro-benchmark: serializing a 100-item list response
+# Run from the project root:  python -m benchmarks.serialization
+#
+# baseline  → what FastAPI does with response_model: validate ORM objects into models,
+#             dump them to dicts, json.dumps (JSONResponse)
+# orjson    → same, but the dicts are encoded by orjson (ORJSONResponse)
+# adapter   → serialization.dump_json: ORM objects → JSON bytes in one pydantic-core pass
+# cached    → @cached(model=...) hit from the local tier: the stored bytes as the body
+import importlib
+import json
+import timeit
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.core.serialization import JSONBytesResponse, dump_json
+from app.domain.user import models, schema
+
+importlib.import_module("app.domain.post.models")   # registers Post, the mapper of User.post_ref
+
+N = 2000
+
+
+def main():
+    users = [models.User(id=i, name=f"User {i}", email=f"user{i}@example.com", password="x", level=0) for i in range(100)]
+    page = {"data": users, "pagination": {"page_size": 100, "current_page": 1, "total_users": 100}}
+    adapter = TypeAdapter(schema.UserList)
+    body = dump_json(adapter, page)
+
+    def baseline():
+        content = adapter.dump_python(adapter.validate_python(page, from_attributes=True), mode="json")
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def with_orjson():
+        return orjson.dumps(adapter.dump_python(adapter.validate_python(page, from_attributes=True), mode="json"))
+
+    cases = {
+        "baseline": baseline,
+        "orjson": with_orjson,
+        "adapter": lambda: dump_json(adapter, page),
+        "cached": lambda: JSONBytesResponse(body),
+    }
+    assert json.loads(baseline()) == json.loads(dump_json(adapter, page))
+    baseline_us = None
+    for name, fn in cases.items():
+        per_call_us = min(timeit.repeat(fn, number=N, repeat=3)) / N * 1e6
+        baseline_us = baseline_us or per_call_us
+        print(f"{name:<9} {per_call_us:9.2f} µs/response  ({baseline_us / per_call_us:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import itertools
+from contextlib import contextmanager
+
+import httpx
+import pytest
+
+from app.core import database
+from app.core import query_budget as budget
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.limiter import limiter
+from app.core.redis import get_redis_client
+from app.domain.user.utils import auth
+from app.domain.user.utils.hashing import hash_password
+
+
+# Async tests: @pytest.mark.anyio (anyio's pytest plugin, anyio comes with FastAPI)
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+## App client: the real app over httpx's ASGI transport (no sockets, no lifespan)
+# Database: a fresh SQLite file per test, Redis: fakeredis, rate limits off.
+# Same set-up as `python -m benchmarks.loadtest`; the globals it swaps are restored afterwards.
+#   @pytest.mark.anyio
+#   async def test_me(client, make_user, auth_headers):
+#       user = await make_user(level=1)
+#       response = await client.get("/api/v1/user/me", headers=auth_headers(user))
+@pytest.fixture
+async def client(tmp_path, monkeypatch):
+    from benchmarks.loadtest import boot
+    from app.main import app
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(database, "async_engine", database.async_engine)
+    monkeypatch.setattr(database, "AsyncSessionLocal", database.AsyncSessionLocal)
+    monkeypatch.setattr(get_redis_client(), "_client", None)
+    for local in (response_cache.local, response_cache.versions, auth.principal_cache, limiter.local):
+        local.clear()
+
+    engine = await boot(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", None)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    await engine.dispose()
+
+
+PASSWORD = "secret-password"
+_password_hash = None
+
+
+# Insert a user straight into the test database (bcrypt runs once per test session)
+@pytest.fixture
+def make_user(client):
+    from app.domain.user.models import User
+
+    numbers = itertools.count()
+
+    async def make(level: int = 0, **fields):
+        global _password_hash
+        if _password_hash is None:
+            _password_hash = hash_password(PASSWORD)
+        number = next(numbers)
+        fields.setdefault("name", f"User {number}")
+        fields.setdefault("email", f"user{number}@example.com")
+        async with database.AsyncSessionLocal() as db:
+            user = User(password=_password_hash, level=level, **fields)
+            db.add(user)
+            await db.commit()
+            return user
+
+    return make
+
+
+# Bearer header for a user: headers=auth_headers(user)
+@pytest.fixture
+def auth_headers():
+    def headers(user) -> dict:
+        return {"Authorization": f"Bearer {auth.create_access_token({'sub': str(user.id)})}"}
+
+    return headers
+
+
+## Query budget: fail a test that issues more SQL statements than it declares
+#   async def test_read_users(client, query_budget):
+#       with query_budget(max_statements=2):
+#           await client.get("/api/v1/user/users/")
+# On failure the message lists the most repeated statements (fingerprints), so an N+1
+# shows up as "12× SELECT posts ... WHERE posts.user_id = ?".
+@pytest.fixture
+def query_budget():
+    @contextmanager
+    def check(max_statements: int, max_ms: float | None = None):
+        # hooked here, not at fixture set-up: the `client` fixture swaps the async engine
+        budget.install(database.engine)
+        budget.install(database.async_engine.sync_engine)
+        with budget.record_queries() as log:
+            yield log
+        offenders = "\n".join(f"  {row['count']}× ({row['ms']} ms) {row['sql']}" for row in log.top())
+        assert log.statements <= max_statements, (
+            f"{log.statements} SQL statements, budget is {max_statements}:\n{offenders}"
+        )
+        if max_ms is not None:
+            assert log.total_ms <= max_ms, f"{log.total_ms:.1f} ms in SQL, budget is {max_ms} ms:\n{offenders}"
+
+    return check
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import ResponseCache
+from app.core.redis import get_redis_client
+
+pytestmark = pytest.mark.anyio
+
+
+# A sign-up retires every cached page of the user list, without a SCAN
+async def test_signup_bumps_user_list_version(client, make_user):
+    await make_user()
+    first = (await client.get("/api/v1/user/users/")).json()
+    assert first["pagination"]["total_users"] == 1
+
+    response = await client.post("/api/v1/user/", json={
+        "name": "New", "email": "new@example.com", "password": "secret", "level": 0,
+    })
+    assert response.status_code == 200
+    second = (await client.get("/api/v1/user/users/")).json()
+    assert second["pagination"]["total_users"] == 2
+
+
+# Other workers learn the new version from the pub/sub message, and never go back
+async def test_version_messages(client):
+    cache = ResponseCache(get_redis_client())
+    assert await cache.version("users") == 0
+    cache._apply_invalidation({"versions": {"users": 3}})
+    cache._apply_invalidation({"versions": {"users": 2}})
+    assert await cache.version("users") == 3
+
+
+# Principals have their own LRU: not in the response cache, kept when Redis fails
+async def test_principals_not_in_response_cache(client, make_user, auth_headers, monkeypatch):
+    from app.core.cache import response_cache
+    from app.domain.user.utils import auth
+
+    user = await make_user()
+    await client.get("/api/v1/user/me", headers=auth_headers(user))
+    assert auth.principal_cache.stats()["size"] == 1
+    assert response_cache.local.stats()["size"] == 0
+    monkeypatch.setattr(response_cache, "_down_until", 0.0)   # restored after the test
+    response_cache._mark_down(ConnectionError("test"))
+    assert auth.principal_cache.stats()["size"] == 1
+
+
+# Stale-while-revalidate: stale hits are answered at once, one background load refreshes
+async def test_stale_hit_refreshes_in_background(client):
+    cache = ResponseCache(get_redis_client())
+    await cache._write("key", b'"old"', ttl=-1, stale_ttl=60)   # already stale
+    release = asyncio.Event()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return b'"new"'
+
+    values = await asyncio.gather(*(cache.get_or_set("key", 60, loader, stale_ttl=60) for _ in range(3)))
+    assert values == [b'"old"'] * 3
+    assert cache.stats()["redis"]["refreshing"] == 1
+
+    release.set()
+    await asyncio.gather(*cache._refreshing.values())
+    assert calls == 1
+    assert await cache.get_or_set("key", 60, loader, stale_ttl=60) == b'"new"'
+
+
+async def test_failed_background_refresh_is_logged(client, caplog):
+    cache = ResponseCache(get_redis_client())
+    await cache._write("key", b'"old"', ttl=-1, stale_ttl=60)
+
+    async def loader():
+        raise RuntimeError("database down")
+
+    assert await cache.get_or_set("key", 60, loader, stale_ttl=60) == b'"old"'
+    await asyncio.gather(*cache._refreshing.values(), return_exceptions=True)
+    await asyncio.sleep(0)   # done callbacks
+    assert not cache._refreshing
+    assert any("Background refresh of key failed" in record.getMessage() for record in caplog.records)
+
+
+# The endpoint's refresh runs on its own session, after the request's one is closed
+async def test_stale_user_list_refreshed_with_own_session(client, make_user):
+    from app.core.cache import response_cache
+
+    await make_user()
+    await client.get("/api/v1/user/users/")
+    key = "users:v0:page=1:size=10:cursor=None:total=False"
+    body = (await response_cache._read(key))["v"]
+    await response_cache._write(key, body, ttl=-1, stale_ttl=30)
+    response_cache.local.clear()
+    await make_user()   # not through the API: no version bump
+
+    stale = await client.get("/api/v1/user/users/")
+    assert stale.json()["pagination"]["total_users"] == 1
+    await asyncio.gather(*response_cache._refreshing.values())
+    response_cache.local.clear()
+    fresh = await client.get("/api/v1/user/users/")
+    assert fresh.json()["pagination"]["total_users"] == 2
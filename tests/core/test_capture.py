@@ -0,0 +1,12 @@
+import hashlib
+
+from app.core.capture import body_digest
+
+LOGIN = b'{"username": "alice@example.com", "password": "hunter2"}'
+
+
+# A captured login body can't be matched against a dictionary without the server's key
+def test_body_digest_is_keyed():
+    assert body_digest(LOGIN) == body_digest(LOGIN)
+    assert body_digest(LOGIN) != hashlib.sha256(LOGIN).hexdigest()
+    assert body_digest(LOGIN) != body_digest(LOGIN.replace(b"hunter2", b"hunter3"))
@@ -0,0 +1,23 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+DEEP_USERS = "query($n: Int!) { users(first: $n) { id posts { id user { id posts { id } } } } }"
+
+
+# The cost depends on the variables: rejecting one call must not reject the query text
+async def test_query_cost_not_cached_with_document(client, make_user):
+    await make_user()
+    expensive = (await client.post("/graphql", json={"query": DEEP_USERS, "variables": {"n": 1000}})).json()
+    assert expensive["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
+
+    cheap = (await client.post("/graphql", json={"query": DEEP_USERS, "variables": {"n": 1}})).json()
+    assert "errors" not in cheap, cheap
+    assert len(cheap["data"]["users"]) == 1
+    assert cheap["extensions"]["cost"]["requested"] < expensive["extensions"]["cost"]["requested"]
+
+
+async def test_validation_errors_cached(client):
+    for _ in range(2):
+        body = (await client.post("/graphql", json={"query": "{ users { nope } }"})).json()
+        assert "nope" in body["errors"][0]["message"]
@@ -0,0 +1,94 @@
+import fakeredis
+import pytest
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.limiter import RateLimit, RateLimiter, RateLimitExceeded, parse_limits
+from app.core.redis import RedisClient
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("5/minute", [RateLimit(5, 60)]),
+    ("10 per hour", [RateLimit(10, 3600)]),
+    ("1/2 seconds", [RateLimit(1, 2)]),
+    ("1 per 2 seconds", [RateLimit(1, 2)]),
+    ("3/Day", [RateLimit(3, 86400)]),
+    ("100/month", [RateLimit(100, 30 * 86400)]),
+    ("5/minute;100/hour", [RateLimit(5, 60), RateLimit(100, 3600)]),
+    ("5/minute; 100 per hour, 1000/day | 2/1 second", [
+        RateLimit(5, 60), RateLimit(100, 3600), RateLimit(1000, 86400), RateLimit(2, 1),
+    ]),
+])
+def test_parse_limits(value, expected):
+    assert parse_limits(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "5", "minute", "5/fortnight", "five/minute", "5/minute;", "-1/minute"])
+def test_parse_limits_invalid(value):
+    with pytest.raises(ValueError):
+        parse_limits(value)
+
+
+def test_limit_str():
+    assert str(RateLimit(5, 60)) == "5 per 1 minute"
+    assert str(RateLimit(1, 2)) == "1 per 2 second"
+
+
+## GCRA: `amount` requests per period, then 429 until the next slot frees up
+@pytest.fixture(autouse=True)
+def rate_limits_on(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+
+
+def make_request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "client": ("10.0.0.1", 1234)})
+
+
+def limited(rate_limiter: RateLimiter, limit_value: str):
+    @rate_limiter.limit(limit_value)
+    async def endpoint(request: Request):
+        return "ok"
+
+    return endpoint
+
+
+async def assert_limited(endpoint, amount: int, period: int):
+    for _ in range(amount):
+        assert await endpoint(request=make_request()) == "ok"
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        await endpoint(make_request())
+    assert exc_info.value.status_code == 429
+    assert 1 <= int(exc_info.value.headers["Retry-After"]) <= period // amount
+
+
+@pytest.mark.anyio
+async def test_limit_memory():
+    rate_limiter = RateLimiter(storage="memory")
+    await assert_limited(limited(rate_limiter, "3/minute"), 3, 60)
+    assert (rate_limiter.allowed, rate_limiter.rejected) == (3, 1)
+
+
+@pytest.mark.anyio
+async def test_limit_redis():
+    redis_client = RedisClient()
+    redis_client._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    rate_limiter = RateLimiter(storage="redis", redis_client=redis_client)
+    await assert_limited(limited(rate_limiter, "3/minute"), 3, 60)
+    assert rate_limiter.fallbacks == 0
+    assert rate_limiter.local.stats()["size"] == 0
+
+
+# Redis unreachable: the local counters take over instead of failing the request
+@pytest.mark.anyio
+async def test_limit_redis_down():
+    rate_limiter = RateLimiter(storage="redis", redis_client=RedisClient("redis://127.0.0.1:1/0"))
+    await assert_limited(limited(rate_limiter, "3/minute"), 3, 60)
+    assert rate_limiter.fallbacks == 1
+    assert rate_limiter.stats()["redis_down"]
+
+
+def test_limit_needs_request():
+    with pytest.raises(TypeError, match="request: Request"):
+        @RateLimiter().limit("5/minute")
+        async def endpoint(user_id: int):
+            return user_id
@@ -0,0 +1,54 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_posts(client, user, *titles) -> list[int]:
+    response = await client.post(
+        "/api/post/batch", json=[{"title": title, "content": "...", "user_id": user.id} for title in titles]
+    )
+    assert response.status_code == 200, response.text
+    return [post["id"] for post in response.json()]
+
+
+async def test_create_batch(client, make_user):
+    user = await make_user()
+    ids = await create_posts(client, user, "First", "Second", "Third")
+    assert len(set(ids)) == 3
+    response = await client.get("/api/post", params={"ids": ",".join(map(str, ids))})
+    assert [post["title"] for post in response.json()] == ["First", "Second", "Third"]
+
+
+# The answer follows the order of ?ids=; unknown ids are dropped, repeated ids returned once
+@pytest.mark.parametrize("ids, expected", [
+    ("2,1", ["Second", "First"]),
+    ("2,1,99", ["Second", "First"]),
+    ("1,1,2,1", ["First", "Second"]),
+    ("99", []),
+])
+async def test_get_by_ids(client, make_user, ids, expected):
+    assert await create_posts(client, await make_user(), "First", "Second") == [1, 2]   # fresh database
+    response = await client.get("/api/post", params={"ids": ids})
+    assert response.status_code == 200
+    assert [post["title"] for post in response.json()] == expected
+
+
+@pytest.mark.parametrize("ids", ["", "1,x", ",".join(["1"] * 101)])
+async def test_get_by_ids_invalid(client, ids):
+    assert (await client.get("/api/post", params={"ids": ids})).status_code == 400
+
+
+# A taken title is a 400 for the single and the batch create; a failed batch stores nothing
+async def test_create_existing_title(client, make_user):
+    user = await make_user()
+    await create_posts(client, user, "Taken")
+    single = await client.post("/api/post/", json={"title": "Taken", "content": "...", "user_id": user.id})
+    assert single.status_code == 400
+    for titles in (["New", "Taken"], ["New", "New"]):
+        batch = await client.post(
+            "/api/post/batch", json=[{"title": title, "content": "...", "user_id": user.id} for title in titles]
+        )
+        assert batch.status_code == 400
+    assert (await client.post("/api/post/batch", json=[])).status_code == 400
+    response = await client.get("/api/post", params={"ids": "1,2,3"})
+    assert [post["title"] for post in response.json()] == ["Taken"]
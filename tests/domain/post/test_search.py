@@ -0,0 +1,42 @@
+import pytest
+
+from app.core import pagination
+
+pytestmark = pytest.mark.anyio
+
+
+# (rank, id) cursors: ts_rank_cd is a float4, handed back to Postgres as a float8; the
+# keyset comparison only holds if the cursor gives back exactly the float it was given
+@pytest.mark.parametrize("rank", [0.0, 0.1, 0.10000000149011612, 1 / 3, 1e-20, 12.5])
+def test_rank_cursor_round_trip(rank):
+    cursor = pagination.encode_cursor(rank=rank, id=42)
+    assert pagination.decode_cursor(cursor) == {"rank": rank, "id": 42}
+    assert "=" not in cursor   # goes into a query string as is
+
+
+async def test_list_pages(client, make_user):
+    user = await make_user()
+    posts = [{"title": f"Post {i}", "content": "...", "user_id": user.id} for i in range(5)]
+    assert (await client.post("/api/post/batch", json=posts)).status_code == 200
+    seen, cursor = [], None
+    while True:
+        params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/api/post/search", params=params)).json()
+        seen += [post["id"] for post in page["data"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+
+
+# With ?q= the cursor must carry a numeric rank next to the id (checked before any SQL)
+@pytest.mark.parametrize("q, cursor", [
+    (None, "not-a-cursor"),
+    (None, pagination.encode_cursor(id="5")),
+    ("fastapi", pagination.encode_cursor(id=5)),
+    ("fastapi", pagination.encode_cursor(rank="high", id=5)),
+    ("fastapi", pagination.encode_cursor(rank=0.5)),
+])
+async def test_invalid_cursor(client, q, cursor):
+    params = {"cursor": cursor, **({"q": q} if q else {})}
+    assert (await client.get("/api/post/search", params=params)).status_code == 400
@@ -0,0 +1,56 @@
+import pytest
+
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+BULK_BODY = '{"name": "Mallory", "email": "mallory@example.com", "password": "x", "level": 99}\n'
+
+
+async def test_bulk_import_requires_login(client):
+    response = await client.post("/api/v2/user/bulk", content=BULK_BODY)
+    assert response.status_code == 401
+
+
+async def test_bulk_import_requires_admin(client, make_user, auth_headers):
+    user = await make_user(level=settings.ADMIN_LEVEL - 1)
+    response = await client.post("/api/v2/user/bulk?prehashed=true", content=BULK_BODY, headers=auth_headers(user))
+    assert response.status_code == 403
+
+
+async def test_internal_requires_login(client):
+    assert (await client.get("/internal/cache")).status_code == 401
+
+
+async def test_internal_requires_admin(client, make_user, auth_headers):
+    user = await make_user(level=settings.ADMIN_LEVEL - 1)
+    assert (await client.get("/internal/cache", headers=auth_headers(user))).status_code == 403
+
+
+async def test_internal_admin(client, make_user, auth_headers):
+    admin = await make_user(level=settings.ADMIN_LEVEL)
+    response = await client.get("/internal/cache", headers=auth_headers(admin))
+    assert response.status_code == 200
+    assert "local" in response.json()
+
+
+async def test_internal_scrape_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_TOKEN", "scrape-token")
+    ok = await client.get("/internal/metrics", headers={"Authorization": "Bearer scrape-token"})
+    assert ok.status_code == 200
+    wrong = await client.get("/internal/metrics", headers={"Authorization": "Bearer other-token"})
+    assert wrong.status_code == 401
+
+
+@pytest.mark.parametrize("path", ["/api/v1/user/export", "/api/post/export"])
+async def test_export_requires_admin(client, make_user, auth_headers, path):
+    assert (await client.get(path)).status_code == 401
+    user = await make_user(level=settings.ADMIN_LEVEL - 1)
+    assert (await client.get(path, headers=auth_headers(user))).status_code == 403
+
+
+async def test_user_export_admin(client, make_user, auth_headers):
+    admin = await make_user(level=settings.ADMIN_LEVEL)
+    response = await client.get("/api/v1/user/export", params={"format": "csv"}, headers=auth_headers(admin))
+    assert response.status_code == 200
+    assert response.text.splitlines() == ["id,name,email,level", f"{admin.id},User 0,user0@example.com,{admin.level}"]
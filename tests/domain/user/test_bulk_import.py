@@ -0,0 +1,99 @@
+import json
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import OperationalError
+
+from app.core import database
+from app.core.config import settings
+from app.domain.user.models import User
+from app.domain.user.utils import auth
+from app.domain.user.utils.hashing import hash_password
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def import_users(client, make_user, auth_headers, monkeypatch):
+    # chunks of 2 rows; plaintext passwords get a stand-in hash (bcrypt is tested elsewhere)
+    async def run(passwords):
+        return [f"hash:{password}" for password in passwords]
+
+    monkeypatch.setattr(settings, "BULK_IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(auth.hashing_pool, "run", lambda fn, passwords: run(passwords))
+
+    async def post(body: str, content_type="application/x-ndjson", **params) -> list[dict]:
+        admin = await make_user(level=settings.ADMIN_LEVEL, email="admin@example.com")
+        response = await client.post(
+            "/api/v2/user/bulk", content=body, params=params,
+            headers={**auth_headers(admin), "Content-Type": content_type},
+        )
+        assert response.status_code == 200
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    return post
+
+
+async def count_users() -> int:
+    async with database.AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(User).where(User.email != "admin@example.com"))
+
+
+def ndjson(*rows) -> str:
+    return "".join(json.dumps({"name": email.split("@")[0], "email": email, "password": password, "level": 0}) + "\n"
+                   for email, password in rows)
+
+
+async def test_import_ndjson(import_users):
+    lines = await import_users(ndjson(
+        ("a@example.com", "pw"), ("b@example.com", "pw"),
+        ("c@example.com", "pw"), ("a@example.com", "pw"),   # repeated in the file
+        ("admin@example.com", "pw"),                         # already in the table
+    ) + "not json\n")
+    errors = {line["row"]: line["errors"][0]["msg"] for line in lines if "row" in line}
+    assert errors[4] == "Duplicate email in this import."
+    assert errors[5] == "Email already exist."
+    assert errors[6].startswith("Invalid JSON")
+    assert [line["progress"] for line in lines if "progress" in line] == [
+        {"rows": 2, "inserted": 2, "failed": 0},
+        {"rows": 4, "inserted": 3, "failed": 1},
+        {"rows": 6, "inserted": 3, "failed": 3},
+    ]
+    assert lines[-1] == {"summary": {"rows": 6, "inserted": 3, "failed": 3}}
+    assert await count_users() == 3
+
+
+async def test_import_csv_prehashed(import_users):
+    password_hash = hash_password("secret")
+    body = (
+        "name,email,password,level\n"
+        f'A,a@example.com,{password_hash},0\n'
+        "B,b@example.com,plaintext,0\n"          # ?prehashed=true takes bcrypt hashes only
+        f'C,c@example.com,{password_hash},0\n'
+        "D,d@example.com,x\n"
+    )
+    lines = await import_users(body, content_type="text/csv", prehashed="true")
+    assert [(line["row"], line["email"]) for line in lines if "row" in line] == [(2, "b@example.com"), (4, None)]
+    assert lines[-1] == {"summary": {"rows": 4, "inserted": 2, "failed": 2}}
+    async with database.AsyncSessionLocal() as db:
+        stored = await db.scalar(select(User.password).where(User.email == "c@example.com"))
+    assert stored == password_hash
+
+
+# A database error after the first chunk: that chunk stays committed, the stream ends with
+# an error line and a summary of what was committed
+async def test_import_database_error(import_users):
+    inserts = 0
+
+    def fail_second_chunk(conn, cursor, statement, parameters, context, executemany):
+        nonlocal inserts
+        if "ON CONFLICT" in statement:
+            inserts += 1
+            if inserts == 2:
+                raise OperationalError(statement, parameters, Exception("connection lost"))
+
+    event.listen(database.async_engine.sync_engine, "before_cursor_execute", fail_second_chunk)
+    lines = await import_users(ndjson(*((f"user{i}@test.com", "pw") for i in range(6))))
+    assert lines[-2]["error"].startswith("Database error")
+    assert lines[-1] == {"summary": {"rows": 4, "inserted": 2, "failed": 0}}
+    assert await count_users() == 2
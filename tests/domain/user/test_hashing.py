@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.domain.user.utils import auth
+
+pytestmark = pytest.mark.anyio
+
+
+# Bulk hashing: small jobs, never the whole pool, results in input order
+async def test_bulk_hashing_leaves_a_worker_free(monkeypatch):
+    running = peak = 0
+    jobs = []
+
+    async def run(fn, passwords):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        jobs.append(len(passwords))
+        await asyncio.sleep(0.001)
+        running -= 1
+        return [f"hash:{password}" for password in passwords]
+
+    monkeypatch.setattr(auth.hashing_pool, "run", run)
+    passwords = [str(i) for i in range(50)]
+    assert await auth.hash_passwords_async(passwords) == [f"hash:{password}" for password in passwords]
+    assert max(jobs) <= settings.HASH_POOL_BULK_BATCH
+    assert peak <= max(auth.hashing_pool.max_workers - 1, 1)
+
+
+async def test_bulk_hashing_empty():
+    assert await auth.hash_passwords_async([]) == []
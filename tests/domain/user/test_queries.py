@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.domain.post.models import Post
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_posts(user, count: int):
+    async with database.AsyncSessionLocal() as db:
+        db.add_all(Post(title=f"Post {i}", content="...", user_id=user.id) for i in range(count))
+        await db.commit()
+
+
+# count + one page
+async def test_user_list_page(client, make_user, query_budget):
+    for _ in range(3):
+        await make_user()
+    with query_budget(max_statements=2):
+        response = await client.get("/api/v1/user/users/", params={"page_size": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert [user["name"] for user in body["data"]] == ["User 0", "User 1"]
+    assert body["pagination"]["total_users"] == 3
+    assert body["pagination"]["next_page"] == 2
+
+
+# a cached page doesn't touch the database
+async def test_user_list_cached(client, make_user, query_budget):
+    await make_user()
+    await client.get("/api/v1/user/users/")
+    with query_budget(max_statements=0):
+        response = await client.get("/api/v1/user/users/")
+    assert response.status_code == 200
+
+
+# keyset page: one statement, whatever the cursor
+async def test_user_list_cursor(client, make_user, query_budget):
+    for _ in range(3):
+        await make_user()
+    first = (await client.get("/api/v1/user/users/", params={"page_size": 2})).json()
+    with query_budget(max_statements=1):
+        response = await client.get("/api/v1/user/users/", params={"cursor": first["pagination"]["next_cursor"]})
+    assert [user["name"] for user in response.json()["data"]] == ["User 2"]
+    assert response.json()["pagination"]["next_cursor"] is None
+
+
+# user + one page of posts, no query per post
+async def test_user_posts(client, make_user, query_budget):
+    user = await make_user()
+    await add_posts(user, 5)
+    with query_budget(max_statements=2):
+        response = await client.get(f"/api/v1/user/{user.id}/posts")
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 5
+
+
+async def test_user_posts_unknown_user(client):
+    response = await client.get("/api/v1/user/999/posts")
+    assert response.status_code == 404
+
+
+# users + their posts in one selectinload query, not one per user
+async def test_graphql_users_with_posts(client, make_user, query_budget):
+    for _ in range(5):
+        await add_posts(await make_user(), 2)
+    with query_budget(max_statements=2):
+        response = await client.post("/graphql", json={"query": "{ users { id posts { id } } }"})
+    body = response.json()
+    assert "errors" not in body, body
+    assert [len(user["posts"]) for user in body["data"]["users"]] == [2] * 5
+
+
+
+# Sibling root fields dispatch their loader batches in the same tick; the request's
+# single AsyncSession must still see one statement at a time
+async def test_graphql_loader_batches_share_session_serially(client, make_user, monkeypatch):
+    first, second = await make_user(), await make_user()
+    running, overlaps = 0, []
+    execute = AsyncSession.execute
+
+    async def tracked(self, *args, **kwargs):
+        nonlocal running
+        running += 1
+        overlaps.append(running)
+        await asyncio.sleep(0.01)
+        try:
+            return await execute(self, *args, **kwargs)
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(AsyncSession, "execute", tracked)
+    query = f'{{ a: user(id: {first.id}) {{ id }} b: userByEmail(email: "{second.email}") {{ id }} }}'
+    response = await client.post("/graphql", json={"query": query})
+    body = response.json()
+    assert "errors" not in body, body
+    assert body["data"] == {"a": {"id": first.id}, "b": {"id": second.id}}
+    assert max(overlaps) == 1
+
+# The principal is cached per token: no user lookup on the next request
+async def test_me_cached_principal(client, make_user, auth_headers, query_budget):
+    user = await make_user()
+    headers = auth_headers(user)
+    assert (await client.get("/api/v1/user/me", headers=headers)).json()["id"] == user.id
+    with query_budget(max_statements=0):
+        response = await client.get("/api/v1/user/me", headers=headers)
+    assert response.json()["email"] == user.email
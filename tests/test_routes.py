@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import database
+
+pytestmark = pytest.mark.anyio
+
+POOL_SIZE, MAX_OVERFLOW = 2, 1
+
+
+# Concurrent GraphQL requests: each context holds one pooled connection for the request
+# only, so the pool never goes past pool_size + max_overflow and is empty again afterwards
+async def test_graphql_requests_return_connections(client, make_user, monkeypatch):
+    for _ in range(3):
+        await make_user()
+    engine = create_async_engine(database.async_engine.url, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=10)
+    pool = engine.sync_engine.pool
+    peaks = []
+    event.listen(engine.sync_engine, "checkout", lambda *args: peaks.append(pool.checkedout()))
+    monkeypatch.setattr(database, "async_engine", engine)
+    monkeypatch.setattr(
+        database, "AsyncSessionLocal",
+        async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False, class_=AsyncSession),
+    )
+
+    query = {"query": "{ users { id posts { id } } }"}
+    responses = await asyncio.gather(*(client.post("/graphql", json=query) for _ in range(20)))
+    assert all(len(response.json()["data"]["users"]) == 3 for response in responses)
+    assert len(peaks) >= 20
+    assert max(peaks) <= POOL_SIZE + MAX_OVERFLOW
+    assert pool.checkedout() == 0
+    await engine.dispose()
@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+import pytest
+
+from app import warmup
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_warm_up(client):
+    report = await warmup.warm_up()
+    assert all(isinstance(report[step], float) for step in ("db_connections", "redis", "sql", "graphql", "jwt")), report
+
+
+# An unreachable host costs the warm-up deadline, not its connect timeout
+async def test_warm_up_deadline(client, monkeypatch):
+    async def unreachable():
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(settings, "WARMUP_TIMEOUT", 0.2)
+    monkeypatch.setattr(warmup, "_connect_redis", unreachable)
+    start = time.monotonic()
+    report = await warmup.warm_up()
+    assert time.monotonic() - start < 1
+    assert report["redis"].startswith("timed out")
+    assert report["sql"].startswith("skipped")
+    assert isinstance(report["db_connections"], float)